@@ -19,6 +19,7 @@ from pharaoh.assetlib.resource import *
 
 if TYPE_CHECKING:
     from pharaoh.assetlib.finder import AssetFinder
+    from pharaoh.assetlib.table import AssetQuery
 
 
 def __get_pharaoh_project():
@@ -104,3 +105,19 @@ def get_asset_finder() -> AssetFinder:
     """
     proj = __get_pharaoh_project()
     return proj.asset_finder
+
+
+def asset_query(condition: str = "", components: str | list[str] | None = None) -> AssetQuery:
+    """
+    Returns a lazy, chainable :class:`AssetQuery <pharaoh.assetlib.table.AssetQuery>` on the assets of the
+    current project.
+
+    Example::
+
+        plot = asset_query("asset.suffix == '.html'").where("label == 'my_plot'").first()
+
+    :param condition: An optional condition, see :func:`AssetFinder.search_assets
+        <pharaoh.assetlib.finder.AssetFinder.search_assets>`
+    :param components: A list of component names to search. If None (the default), all components are searched.
+    """
+    return get_asset_finder().asset_query(condition, components)
@@ -105,13 +105,27 @@ class MetadataContextStack:
         Dumps the currently active context stack to a companion file of the
         asset with the file suffix ".assetinfo" and returns its path.
 
+        The asset is added to the project's asset finder, if it was already created
+        (see :func:`pharaoh.assetlib.finder.AssetFinder.add_asset`).
+
+        If setting ``asset_gen.render_fragments`` is enabled, the RST fragment of the asset is rendered as well
+        (see :func:`pharaoh.templating.second_level.sphinx_ext.asset_tmpl.render_asset_fragment`).
+
+        If setting ``asset_gen.deduplicate`` is enabled, the asset file is first deduplicated by its content hash
+        (see :func:`pharaoh.assetlib.dedup.deduplicate`) and the hash is stored as ``asset.content_hash``.
+
         :param asset_filepath: The path to the asset file for which the companion file shall be created.
                                This path is created by PharaohApp.build_asset_filepath
         """
         asset_filepath = Path(asset_filepath)
         merged_stack = self.merge_stacks()
+        content_hash = _deduplicate_asset(asset_filepath)
+        if content_hash is not None:
+            merged_stack["asset"]["content_hash"] = content_hash
         assetinfo = asset_filepath.parent / f"{asset_filepath.stem}.assetinfo"
         assetinfo.write_text(json_encoder.encode_json(merged_stack, indent=1))
+        _render_fragment(assetinfo, asset_filepath)
+        _publish_asset(assetinfo, asset_filepath)
         log.debug(
             f"Created asset {merged_stack['asset']['name']!r} from script "
             f"{merged_stack['asset'].get('script_name', '__unknown__')!r}."
@@ -119,6 +133,47 @@ class MetadataContextStack:
         return assetinfo
 
 
+def _deduplicate_asset(asset_filepath: Path) -> str | None:
+    from pharaoh import project
+    from pharaoh.assetlib.dedup import deduplicate
+
+    try:
+        proj = project.get_project()
+    except RuntimeError:
+        return None
+    if not proj.get_setting("asset_gen.deduplicate", False):
+        return None
+    return deduplicate(asset_filepath, proj.asset_blob_dir)
+
+
+def _render_fragment(assetinfo: Path, asset_filepath: Path):
+    from pharaoh import project
+    from pharaoh.assetlib.finder import Asset
+    from pharaoh.templating.second_level.sphinx_ext.asset_tmpl import render_asset_fragment
+
+    try:
+        proj = project.get_project()
+    except RuntimeError:
+        return
+    if proj.get_setting("asset_gen.render_fragments", False):
+        render_asset_fragment(proj, Asset(assetinfo, asset_filepath))
+
+
+def _publish_asset(assetinfo: Path, asset_filepath: Path):
+    from pharaoh import project
+    from pharaoh.assetlib.finder import Asset
+
+    try:
+        proj = project.get_project()
+    except RuntimeError:
+        return
+    if proj._asset_finder is not None:
+        try:
+            proj._asset_finder.add_asset(Asset(assetinfo, asset_filepath))
+        except OSError as e:
+            log.debug(f"Could not add asset {assetinfo} to asset finder: {e}")
+
+
 context_stack = MetadataContextStack()
 metadata_context = context_stack.new_context
 
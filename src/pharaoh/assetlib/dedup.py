@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+from pathlib import Path
+
+from pharaoh.log import log
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: Path) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's content.
+
+    :param path: The file to hash
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def deduplicate(file: Path, blob_dir: Path) -> str | None:
+    """
+    Stores the content of a file only once inside a content-addressed blob directory.
+
+    If a blob with the same content already exists, the file is replaced by a hardlink to that blob.
+    Otherwise the file itself is hardlinked into the blob directory, so following files with identical content
+    can link to it.
+
+    If the file system does not support hardlinks, the file is left untouched.
+
+    :param file: The asset file to deduplicate. Directories are ignored.
+    :param blob_dir: The directory that holds the blobs, named by their content hash.
+    :return: The content hash of the file or None if the file is not a regular file.
+    """
+    file = Path(file)
+    if not file.is_file():
+        return None
+
+    digest = file_digest(file)
+    blob = blob_dir / digest[:2] / digest
+    try:
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(file, blob)
+            return digest
+        except FileExistsError:
+            pass  # Identical content was already stored, e.g. by another worker process
+
+        if os.path.samefile(file, blob):
+            return digest
+        tmp = file.with_name(file.name + ".dedup")
+        os.link(blob, tmp)
+        os.replace(tmp, file)
+        log.debug(f"Deduplicated asset {file.name} (sha256:{digest[:12]})")
+    except OSError as e:
+        log.debug(f"Could not deduplicate asset {file.name}: {e}")
+        with contextlib.suppress(OSError):
+            os.remove(file.with_name(file.name + ".dedup"))
+    return digest
+
+
+def remove_orphaned_blobs(blob_dir: Path) -> int:
+    """
+    Removes all blobs that are not referenced by any asset file anymore (link count of 1).
+
+    :param blob_dir: The directory that holds the blobs
+    :return: The number of removed blobs
+    """
+    if not blob_dir.is_dir():
+        return 0
+
+    removed = 0
+    for subdir in blob_dir.iterdir():
+        if not subdir.is_dir():
+            continue
+        for blob in subdir.iterdir():
+            with contextlib.suppress(OSError):
+                if blob.stat().st_nlink <= 1:
+                    blob.unlink()
+                    removed += 1
+        with contextlib.suppress(OSError):
+            subdir.rmdir()  # only succeeds if empty
+    return removed
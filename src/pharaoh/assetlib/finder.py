@@ -1,20 +1,38 @@
 from __future__ import annotations
 
+import contextlib
 import hashlib
 import json
+import os
 import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-import omegaconf
-
 from pharaoh.log import log
 
+from .metadata import MetadataView, load_metadata, parse_metadata
+from .query import AssetIndex, QueryErrors, compile_query
+from .table import AssetQuery, AssetTable
 from .util import obj_groupby
+from .watch import AssetWatcher
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 if TYPE_CHECKING:
     from collections.abc import Iterable, Iterator
 
+    import omegaconf
+
+# Suffix of the pre-rendered RST fragments stored next to *.assetinfo files
+FRAGMENT_SUFFIX = ".assetrst"
+
 
 class AssetFileLinkBrokenError(LookupError):
     pass
@@ -29,27 +47,79 @@ class Asset:
         Can be used to quickly find this Asset instance.
     :ivar Path infofile: Absolute path to the ``*.assetinfo`` file
     :ivar Path assetfile: Absolute path to the actual asset file
-    :ivar omegaconf.DictConfig context: The content of *infofile* parsed into a OmegaConf dict.
+    :ivar MetadataView context: The content of *infofile* as read-only mapping, whose items can also be accessed
+        like attributes. Parsed lazily on first access. See :class:`pharaoh.assetlib.metadata.MetadataView`.
     """
 
-    def __init__(self, info_file: Path):
+    __slots__ = ("_asset_name", "_context", "_dir", "_info_name", "id")
+
+    def __init__(self, info_file: Path, asset_file: Path | None = None):
+        """
+        :param info_file: The ``*.assetinfo`` file
+        :param asset_file: The actual asset file. If None, it is searched next to *info_file*.
+        """
         assert info_file.suffix == ".assetinfo"
-        self.id: str = "__ID__" + hashlib.md5(bytes(info_file.name, "utf-8")).hexdigest()
-        self.infofile: Path = info_file
-        self.context = omegaconf.OmegaConf.create(json.loads(self.infofile.read_text()))
-        for file in self.infofile.parent.glob(f"{self.infofile.stem}*"):
-            if file.suffix != ".assetinfo":
-                self.assetfile: Path = file
-                break
-        else:
-            msg = f"There is no asset for inventory file {self.infofile}!"
-            raise AssetFileLinkBrokenError(msg)
+        if asset_file is None:
+            for file in info_file.parent.glob(f"{info_file.stem}*"):
+                if file.suffix not in (".assetinfo", FRAGMENT_SUFFIX):
+                    asset_file = file
+                    break
+            else:
+                msg = f"There is no asset for inventory file {info_file}!"
+                raise AssetFileLinkBrokenError(msg)
+        self._init(info_file.parent, info_file.name, asset_file.name)
+
+    @classmethod
+    def _from_listing(cls, directory: Path, info_name: str, asset_name: str) -> Asset:
+        # Assets of the same directory share the directory path instance
+        asset = cls.__new__(cls)
+        asset._init(directory, info_name, asset_name)
+        return asset
+
+    def _init(self, directory: Path, info_name: str, asset_name: str):
+        self.id: str = "__ID__" + hashlib.md5(bytes(info_name, "utf-8")).hexdigest()
+        self._dir = directory
+        self._info_name = info_name
+        self._asset_name = asset_name
+        self._context: MetadataView | omegaconf.DictConfig | None = None
+
+    @property
+    def infofile(self) -> Path:
+        return self._dir / self._info_name
+
+    @property
+    def assetfile(self) -> Path:
+        return self._dir / self._asset_name
+
+    @property
+    def fragmentfile(self) -> Path:
+        """
+        The RST fragment of the asset, pre-rendered during asset generation if setting
+        ``asset_gen.render_fragments`` is enabled. The file may not exist.
+        """
+        return self._dir / (self._info_name[: -len(".assetinfo")] + FRAGMENT_SUFFIX)
+
+    @property
+    def context(self) -> MetadataView | omegaconf.DictConfig:
+        if self._context is None:
+            self._context = load_metadata(self.infofile)
+        return self._context
+
+    @context.setter
+    def context(self, value: MetadataView | omegaconf.DictConfig):
+        self._context = value
+
+    def read_metadata(self) -> dict:
+        """
+        Reads the content of the ``*.assetinfo`` file as plain dictionary.
+        """
+        return parse_metadata(self.infofile.read_text())
 
     def __str__(self):
         return repr(self)
 
     def __repr__(self):
-        return f"Asset[{self.infofile.stem}]"
+        return f"Asset[{self._info_name[: -len('.assetinfo')]}]"
 
     def __eq__(self, other):
         if isinstance(other, Asset):
@@ -57,36 +127,60 @@ class Asset:
         raise NotImplementedError
 
     def __hash__(self):
-        return hash(self.infofile.name)
+        return hash(self._info_name)
 
     def __lt__(self, other):
         if isinstance(other, Asset):
             return self.infofile < other.infofile
         raise NotImplementedError
 
-    def copy_to(self, target_dir: Path) -> Path:
+    def copy_to(self, target_dir: Path, strategy: str = "auto") -> Path:
         """
         Copy the asset plus info-file.
 
+        By default, asset files are hardlinked instead of copied where possible, so byte-identical assets, that share
+        the same deduplicated blob (see :func:`pharaoh.assetlib.dedup.deduplicate`), are also stored only once
+        inside the target directory.
+
         :param target_dir: The target directory to copy to. Will be created if it does not exist.
-        :returns: True if files were copied, False otherwise (files already exist)
+        :param strategy: How asset files are copied, one of :data:`COPY_STRATEGIES`.
+            Info-files are always copied.
+        :returns: The path of the copied asset file
         """
+        self.sync_to(target_dir, strategy)
+        return target_dir / self.assetfile.name
+
+    def sync_to(self, target_dir: Path, strategy: str = "auto") -> bool:
+        """
+        Like :func:`copy_to`, but only copies files that are missing in the target directory or whose size or
+        modification time differ. Files inside asset directories that no longer exist in the source are removed.
+
+        :param target_dir: The target directory to copy to. Will be created if it does not exist.
+        :param strategy: How asset files are copied, one of :data:`COPY_STRATEGIES`.
+        :returns: True if files were copied, False otherwise (all files are up to date)
+        """
+        return self._sync_to(target_dir, strategy, _CopiedBlobs())
+
+    def _sync_to(self, target_dir: Path, strategy: str, blobs: _CopiedBlobs) -> bool:
         target_dir.mkdir(exist_ok=True, parents=True)
         target_info_file = target_dir / self.infofile.name
-        if target_info_file.exists():
-            return target_dir / self.assetfile.name
-
-        log.debug(f"Copying asset {self} to build directory")
-        shutil.copy(self.infofile, target_info_file)
+        target_file = target_dir / self.assetfile.name
 
         if Path(self.assetfile).is_file():
-            return Path(shutil.copy(self.assetfile, target_dir))
-
-        if Path(self.assetfile).is_dir():
-            shutil.copytree(self.assetfile, target_dir / self.assetfile.name)
-            return target_dir / self.assetfile.name
+            copied = not _is_synced(self.assetfile, target_file, strategy)
+            if copied:
+                content_hash = self.context.get("asset", {}).get("content_hash")
+                _sync_file(self.assetfile, target_file, content_hash, strategy, blobs)
+        elif Path(self.assetfile).is_dir():
+            copied = _sync_tree(self.assetfile, target_file, strategy)
+        else:
+            raise NotImplementedError
 
-        raise NotImplementedError
+        # The info file is copied last, so an existing info file marks a complete copy
+        copied = _sync_file(self.infofile, target_info_file, strategy="copy") or copied
+        if copied:
+            log.debug(f"Copied asset {self} to {target_dir}")
+        return copied
 
     def read_json(self) -> dict:
         """
@@ -106,8 +200,10 @@ class Asset:
         if self.assetfile.suffix.lower() not in (".yaml", ".yml"):
             msg = "Can only read .yaml/.yml files!"
             raise Exception(msg)
+        # Use the LibYAML based loader if available, it's much faster than the pure Python one
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
         with open(self.assetfile, encoding="utf-8") as fp:
-            return yaml.safe_load(fp)
+            return yaml.load(fp, Loader=loader)
 
     def read_text(self, encoding: str = "utf-8") -> str:
         """
@@ -122,8 +218,225 @@ class Asset:
         return self.assetfile.read_bytes()
 
 
+# ioctl request code to clone a file on Linux file systems supporting copy-on-write, like Btrfs or XFS
+_FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dst: Path):
+    """
+    Creates a copy-on-write clone of src. Raises OSError if not supported by the platform or file system.
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        msg = "Reflinks are not supported on this platform"
+        raise OSError(msg)
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    except OSError:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(dst)
+        raise
+    shutil.copystat(src, dst)
+
+
+def _symlink(src: Path, dst: Path):
+    os.symlink(Path(src).absolute(), dst)
+
+
+# Maps the copy strategies to the link functions that are tried in order, before falling back to a copy
+_LINK_FUNCTIONS = {
+    "auto": (os.link, _reflink),
+    "hardlink": (os.link,),
+    "reflink": (_reflink,),
+    "symlink": (_symlink,),
+    "copy": (),
+}
+COPY_STRATEGIES = tuple(_LINK_FUNCTIONS)
+
+
+class _CopiedBlobs:
+    """
+    Maps (target directory, content hash) to the first file that was copied there with this content.
+
+    Used to deduplicate copies if the target is not on the same file system as the source.
+    Lives for a single copy operation and may be shared by its worker threads. The size and modification time of a
+    copy are recorded with it, so copies that were modified in the meantime are not linked to.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blobs: dict[tuple[Path, str], tuple[Path, int, int]] = {}
+
+    def link(self, key: tuple[Path, str], src: Path, dst: Path) -> bool:
+        """
+        Hardlinks dst to a previous copy with the same key. Returns False if there is no unmodified copy.
+        """
+        with self._lock:
+            entry = self._blobs.get(key)
+        if entry is None:
+            return False
+        blob, size, mtime_ns = entry
+        try:
+            stat = blob.stat()
+            if stat.st_size == size == src.stat().st_size and stat.st_mtime_ns == mtime_ns:
+                os.link(blob, dst)
+                return True
+        except OSError:
+            pass
+        with self._lock:
+            if self._blobs.get(key) == entry:
+                del self._blobs[key]
+        return False
+
+    def add(self, key: tuple[Path, str], dst: Path):
+        stat = dst.stat()
+        with self._lock:
+            self._blobs.setdefault(key, (dst, stat.st_size, stat.st_mtime_ns))
+
+
+def _link_or_copy(
+    src: Path,
+    dst: Path,
+    content_hash: str | None = None,
+    strategy: str = "auto",
+    blobs: _CopiedBlobs | None = None,
+):
+    """
+    Links src to dst as given by strategy (see :data:`COPY_STRATEGIES`) or copies it, if linking is not supported
+    (e.g. different drives or file systems).
+    In the latter case, a file with the same content hash that was already copied to the same directory during the
+    same copy operation (see *blobs*) is hardlinked instead, unless strategy is "copy".
+    """
+    if strategy not in _LINK_FUNCTIONS:
+        msg = f"Unknown copy strategy {strategy!r}. Valid strategies: {', '.join(COPY_STRATEGIES)}"
+        raise ValueError(msg)
+    for link in _LINK_FUNCTIONS[strategy]:
+        try:
+            link(src, dst)
+            return
+        except OSError:
+            pass
+
+    key = (dst.parent, content_hash) if blobs is not None and content_hash and strategy != "copy" else None
+    if key is not None and blobs.link(key, src, dst):
+        return
+
+    shutil.copy2(src, dst)
+    if key is not None:
+        blobs.add(key, dst)
+
+
+def _is_synced(src: Path, dst: Path, strategy: str = "auto") -> bool:
+    """
+    Checks if dst is a copy of src by comparing size and modification time. Hardlinks are always in sync.
+    Symlinks are only in sync if they point to src and strategy is "symlink".
+    """
+    if os.path.islink(dst):
+        return strategy == "symlink" and os.path.exists(dst) and os.path.samefile(src, dst)
+    try:
+        src_stat = src.stat()
+        dst_stat = dst.stat()
+    except OSError:
+        return False
+    return src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+
+def _remove(path: Path):
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def _sync_file(
+    src: Path,
+    dst: Path,
+    content_hash: str | None = None,
+    strategy: str = "auto",
+    blobs: _CopiedBlobs | None = None,
+) -> bool:
+    """
+    Copies src to dst, unless dst is already in sync. Returns True if the file was copied.
+    """
+    if _is_synced(src, dst, strategy):
+        return False
+    # Remove outdated copies first, writing into an existing hardlink would modify the source as well
+    _remove(dst)
+    _link_or_copy(src, dst, content_hash, strategy, blobs)
+    return True
+
+
+def _sync_tree(src: Path, dst: Path, strategy: str = "auto") -> bool:
+    """
+    Synchronizes the directory src to dst, copying changed files and removing files not present in src.
+    Returns True if anything changed.
+    """
+    if (dst.exists() or dst.is_symlink()) and not (dst.is_dir() and not dst.is_symlink()):
+        _remove(dst)
+    dst.mkdir(exist_ok=True, parents=True)
+    changed = False
+    src_names = set()
+    for entry in os.scandir(src):
+        src_names.add(entry.name)
+        if entry.is_dir():
+            changed = _sync_tree(Path(entry.path), dst / entry.name, strategy) or changed
+        else:
+            changed = _sync_file(Path(entry.path), dst / entry.name, strategy=strategy) or changed
+    for entry in os.scandir(dst):
+        if entry.name not in src_names:
+            _remove(Path(entry.path))
+            changed = True
+    return changed
+
+
+def copy_assets(assets: Iterable[Asset], target_dir: Path, strategy: str = "auto") -> int:
+    """
+    Copies assets into a directory using a thread pool.
+    Only assets that are missing in the target directory or changed (compared by size and modification time)
+    are copied.
+
+    :param assets: The assets to copy
+    :param target_dir: The target directory. Will be created if it does not exist.
+    :param strategy: How asset files are copied, one of :data:`COPY_STRATEGIES`.
+    :returns: The number of copied assets
+    """
+    assets = list(assets)
+    target_dir.mkdir(exist_ok=True, parents=True)
+    with ThreadPoolExecutor(thread_name_prefix="pharaoh_asset_copy") as pool:
+        sync = partial(Asset._sync_to, target_dir=target_dir, strategy=strategy, blobs=_CopiedBlobs())
+        return sum(pool.map(sync, assets))
+
+
+def sync_assets(
+    assets: Iterable[Asset], target_dir: Path, keep: Iterable[Asset] = (), strategy: str = "auto"
+) -> tuple[int, int]:
+    """
+    Incrementally synchronizes assets into a directory.
+
+    Only assets that are missing in the target directory or changed are copied (see :func:`copy_assets`).
+    Files inside the target directory that don't belong to any asset of *assets* or *keep* are removed.
+
+    :param assets: The assets to copy
+    :param target_dir: The target directory. Will be created if it does not exist.
+    :param keep: Other assets, whose existing copies should not be removed (e.g. assets copied on demand)
+    :param strategy: How asset files are copied, one of :data:`COPY_STRATEGIES`.
+    :returns: The number of copied assets and the number of removed files
+    """
+    assets = list(assets)
+    copied = copy_assets(assets, target_dir, strategy)
+
+    names = {name for asset in (*assets, *keep) for name in (asset.infofile.name, asset.assetfile.name)}
+    removed = 0
+    for entry in os.scandir(target_dir):
+        if entry.name not in names:
+            _remove(Path(entry.path))
+            removed += 1
+    return copied, removed
+
+
 class AssetFinder:
-    def __init__(self, lookup_path: Path):
+    def __init__(self, lookup_path: Path, index_file: Path | None = None):
         """
         A class for discovering and searching generated assets.
 
@@ -131,9 +444,24 @@ class AssetFinder:
         ``report_project/.asset_build``.
 
         :param lookup_path: The root directory to look for assets. It will be searched recursively for assets.
+        :param index_file: A file to persist the metadata index (see :class:`pharaoh.assetlib.query.AssetIndex`) to,
+            so components that did not change since the last discovery don't have to be re-indexed.
+            If None, the index is only kept in memory.
         """
         self._lookup_path = lookup_path
         self._assets: dict[str, list[Asset]] = {}
+        self._by_id: dict[str, Asset] = {}
+        self._by_stem: dict[str, Asset] = {}
+        # Incremented whenever the discovered assets change. Part of the query cache key.
+        self._generation = 0
+        self._query_cache: dict[tuple[str, tuple[str, ...] | None, int], list[Asset]] = {}
+        # Errors of the cached queries, for conditions that failed for any asset
+        self._query_errors: dict[tuple[str, tuple[str, ...] | None, int], QueryErrors] = {}
+        self._index = AssetIndex(index_file)
+        # The modification time of each component directory when it was last discovered
+        self._stamps: dict[str, int] = {}
+        self._watcher: AssetWatcher | None = None
+        self._recorders: list[AssetLookups] = []
         self.discover_assets()
 
     def discover_assets(self, components: list[str] | None = None) -> dict[str, list[Asset]]:
@@ -141,32 +469,204 @@ class AssetFinder:
         Discovers all assets by recursively searching for ``*.assetinfo`` files and stores
         the collection as instance variable (`_assets`).
 
+        The metadata of each component is indexed to speed up :func:`search_assets`.
+
         :param components: A list of components to search for assets.
             If None (the default), all components will be searched.
         :return: A dictionary that maps component names to a list of :class:`Asset` instances.
         """
         if isinstance(components, list) and len(components):
             for component in components:
-                self._assets[component] = [Asset(file) for file in (self._lookup_path / component).glob("*.assetinfo")]
+                self._set_component_assets(component, self._discover_component(component))
         else:
             self._assets.clear()
-            for asset in (Asset(file) for file in self._lookup_path.glob("*/*.assetinfo")):
-                component = asset.assetfile.parent.name
-                if component not in self._assets:
-                    self._assets[component] = []
-                self._assets[component].append(asset)
-
+            self._by_id.clear()
+            self._by_stem.clear()
+            self._stamps.clear()
+            try:
+                with os.scandir(self._lookup_path) as entries:
+                    component_names = [entry.name for entry in entries if entry.is_dir()]
+            except OSError:
+                component_names = []
+            for component in component_names:
+                assets = self._discover_component(component)
+                if assets:
+                    self._set_component_assets(component, assets)
+            self._index.retain(self._assets)
+
+        self._index.save()
+        self._invalidate_queries()
         return self._assets
 
-    def search_assets(self, condition: str, components: str | Iterable[str] | None = None) -> list[Asset]:
+    def _discover_component(self, component: str) -> list[Asset]:
+        """
+        Lists the component directory once and pairs each ``*.assetinfo`` file with its asset file.
+        Metadata is only read if the component has to be (re-)indexed.
+        """
+        component_dir = self._lookup_path / component
+        try:
+            stamp = component_dir.stat().st_mtime_ns
+            with os.scandir(component_dir) as entries:
+                names = [entry.name for entry in entries]
+        except OSError:  # does not exist
+            self._stamps.pop(component, None)
+            return []
+        self._stamps[component] = stamp
+
+        asset_files = _pair_asset_files(component_dir, names)
+        index = self._index.get_fresh(component, stamp, asset_files)
+        if index is None:
+            assets = [Asset._from_listing(component_dir, name, asset_files[name]) for name in asset_files]
+            self._index.build(component, stamp, ((asset.infofile.name, asset.read_metadata()) for asset in assets))
+            return assets
+        return [Asset._from_listing(component_dir, name, asset_files[name]) for name in index.names]
+
+    def refresh(self, components: Iterable[str] | None = None) -> list[str]:
+        """
+        Re-discovers only the components whose directory changed since they were last discovered,
+        e.g. because another process generated assets.
+
+        :param components: A list of component names to check. If None (the default), all existing and
+            already discovered components are checked.
+        :return: The names of the re-discovered components
+        """
+        if components is None:
+            try:
+                with os.scandir(self._lookup_path) as entries:
+                    candidates = {entry.name for entry in entries if entry.is_dir()}
+            except OSError:
+                candidates = set()
+            candidates.update(self._assets)
+        else:
+            candidates = set(components)
+
+        changed = []
+        for component in sorted(candidates):
+            try:
+                stamp = (self._lookup_path / component).stat().st_mtime_ns
+            except OSError:
+                stamp = None
+            if stamp != self._stamps.get(component):
+                changed.append(component)
+        if not changed:
+            return changed
+
+        for component in changed:
+            assets = self._discover_component(component)
+            if assets:
+                self._set_component_assets(component, assets)
+            elif component in self._assets:
+                self._set_component_assets(component, [])
+                del self._assets[component]
+        self._index.retain(self._assets)
+        self._index.save()
+        self._invalidate_queries()
+        log.debug(f"Re-discovered assets of components {changed}")
+        return changed
+
+    def watch(self, interval: float = 1.0, use_watchdog: bool = True) -> AssetWatcher:
+        """
+        Keeps the discovered assets up to date with assets created or deleted by other processes,
+        by re-discovering changed components (see :func:`refresh`) before assets are searched or looked up.
+
+        Changes are detected using file system events if `watchdog <https://pypi.org/project/watchdog/>`_
+        is installed, otherwise by polling the component directories at most once per *interval*.
+        Enabled for the project's asset finder via setting ``asset_gen.watch_assets``.
+
+        :param interval: The minimum time in seconds between two polls, if polling is used
+        :param use_watchdog: Use file system events if watchdog is installed. If False, always poll.
+        """
+        if self._watcher is None:
+            self._watcher = AssetWatcher(self._lookup_path, interval, use_watchdog)
+            self._watcher.start()
+        return self._watcher
+
+    def unwatch(self):
+        """
+        Stops watching for changes, see :func:`watch`.
+        """
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _sync(self):
+        if self._watcher is not None:
+            changes = self._watcher.pop_changes()
+            if changes is None or changes:
+                self.refresh(changes)
+
+    def load_metadata(self, components: str | Iterable[str] | None = None):
+        """
+        Parses the metadata of all discovered assets, which is otherwise done lazily on first access.
+
+        Used before asset files are deleted, so already discovered assets keep their metadata.
+
+        :param components: A list of component names. If None (the default), all components are loaded.
+        """
+        for asset in self.iter_assets(components):
+            with contextlib.suppress(OSError):
+                asset.context  # noqa: B018
+
+    def _set_component_assets(self, component: str, assets: list[Asset]):
+        for asset in self._assets.get(component, ()):
+            self._by_id.pop(asset.id, None)
+            self._by_stem.pop(asset.infofile.stem, None)
+        self._assets[component] = assets
+        for asset in assets:
+            self._by_id[asset.id] = asset
+            self._by_stem[asset.infofile.stem] = asset
+
+    def add_asset(self, asset: Asset) -> Asset:
+        """
+        Adds a single asset to the already discovered assets, without re-discovering its component.
+
+        Used to make assets visible that are exported after discovery, e.g. by
+        :func:`pharaoh.assetlib.api.register_asset` or the patched plotting functions.
+
+        :param asset: The :class:`Asset` instance to add. Its component is determined by its parent directory.
+        :return: The added asset, or the already known asset with the same ID
+        """
+        if asset.id in self._by_id:
+            return self._by_id[asset.id]
+        component = asset.infofile.parent.name
+        assets = self._assets.setdefault(component, [])
+        self._index.add(
+            component,
+            asset.infofile.parent.stat().st_mtime_ns,
+            asset.infofile.name,
+            asset.read_metadata(),
+            position=len(assets),
+        )
+        assets.append(asset)
+        self._by_id[asset.id] = asset
+        self._by_stem[asset.infofile.stem] = asset
+        self._invalidate_queries()
+        return asset
+
+    def _invalidate_queries(self):
+        self._generation += 1
+        self._query_cache.clear()
+        self._query_errors.clear()
+
+    def search_assets(
+        self, condition: str | Iterable[str], components: str | Iterable[str] | None = None
+    ) -> list[Asset]:
         """
         Searches already discovered assets (see :func:`discover_assets`) that match a condition.
 
+        The condition is compiled into a :class:`Query <pharaoh.assetlib.query.Query>`, that answers common
+        predicates using the metadata index and only evaluates the remaining parts for each asset.
+        Results are cached until assets are discovered or added again.
+
         :param condition: A Python expression that is evaluated using the content of the ``*.assetinfo`` JSON file
             as namespace. If the evaluation returns a truthy result, the asset is returned.
+            If the evaluation fails (e.g. a metadata key does not exist), the asset does not match.
+            Such errors are logged and can be retrieved using :func:`query_errors`.
 
             Refer to :ref:`this example assetinfo file <example_asset_info>` to see the available default namespace.
 
+            If a list of conditions is given, all assets matching any of them are returned (see :func:`search_many`).
+
             Example::
 
                 # All HTML file where the "label" metadata ends with "_plot"
@@ -175,21 +675,130 @@ class AssetFinder:
         :param components: A list of component names to search. If None (the default), all components will be searched.
         :return: A list of assets whose metadata match the condition.
         """
-        if not condition.strip():
-            return []
+        if isinstance(condition, str):
+            return self.search_many([condition], components)[0]
+
+        found: dict[str, Asset] = {}
+        for assets in self.search_many(condition, components):
+            for asset in assets:
+                found.setdefault(asset.id, asset)
+        return AssetFinder.sort_assets(list(found.values()))
+
+    def search_many(
+        self, conditions: Iterable[str], components: str | Iterable[str] | None = None
+    ) -> list[list[Asset]]:
+        """
+        Searches already discovered assets for multiple conditions at once, like :func:`search_assets`.
 
-        code = compile(condition, "<string>", "eval")
-        found = []
+        Each condition is compiled only once and all uncached conditions are resolved in a single pass over the
+        components, sharing each component's index and metadata.
+        Used by the ``pharaoh-asset`` directive to resolve all of its filters, and to resolve the filters of all
+        directives of the documents to read before the Sphinx read phase.
 
-        for asset in self.iter_assets(components):
-            try:
-                result = eval(code, {}, asset.context)
-            except Exception:
-                result = False
-            if result:
-                found.append(asset)
+        :param conditions: A list of conditions, see :func:`search_assets`
+        :param components: A list of component names to search. If None (the default), all components will be searched.
+        :return: A list of matching assets for each condition, in the order of *conditions*.
+        """
+        conditions = list(conditions)
+        self._sync()
+        components = _normalize_components(components)
+
+        results: dict[str, list[Asset]] = {}
+        pending = []
+        for condition in conditions:
+            if condition in results or condition in pending:
+                continue
+            if not condition.strip():
+                results[condition] = []
+            elif (condition, components, self._generation) in self._query_cache:
+                results[condition] = self._query_cache[(condition, components, self._generation)]
+            else:
+                pending.append(condition)
+
+        if pending:
+            queries = [compile_query(condition) for condition in pending]
+            found: list[list[Asset]] = [[] for _ in pending]
+            errors: list[QueryErrors | None] = [None for _ in pending]
+            total = 0
+            for component in self._select_components(components):
+                assets = self._assets[component]
+                index = self._index.get(component)
+                total += len(assets)
+                for n, (query, matches) in enumerate(zip(queries, found)):
+                    positions, component_errors = query.run(index, len(assets), lambda i, a=assets: a[i].context)
+                    matches.extend(assets[i] for i in sorted(positions))
+                    if component_errors is None:
+                        continue
+                    if errors[n] is None:
+                        errors[n] = QueryErrors(0, 0, component_errors.message)
+                    errors[n].count += component_errors.count
+            for query_errors in errors:
+                if query_errors is not None:
+                    query_errors.total = total
+
+            # The generation may have changed if assets were discovered lazily
+            for condition, matches, query_errors in zip(pending, found, errors):
+                matches = AssetFinder.sort_assets(matches)
+                self._query_cache[(condition, components, self._generation)] = matches
+                results[condition] = matches
+                if query_errors is not None:
+                    self._query_errors[(condition, components, self._generation)] = query_errors
+                    log.debug(f"Search condition {condition!r} was treated as False for some assets: {query_errors}")
+
+        for recorder in self._recorders:
+            for condition in conditions:
+                recorder.add_query(condition, components, results[condition])
+        return [list(results[condition]) for condition in conditions]
+
+    def query_errors(self, condition: str, components: str | Iterable[str] | None = None) -> QueryErrors | None:
+        """
+        Returns the errors of the last search for a condition (see :func:`search_assets`).
+
+        :param condition: The search condition
+        :param components: The components that were searched
+        :return: The errors or None, if the condition was not searched yet or its evaluation succeeded for all assets.
+        """
+        return self._query_errors.get((condition, _normalize_components(components), self._generation))
+
+    def asset_table(self, condition: str = "", components: str | Iterable[str] | None = None) -> AssetTable:
+        """
+        Returns the flattened metadata of discovered assets as column-oriented :class:`AssetTable
+        <pharaoh.assetlib.table.AssetTable>`, that can be filtered, sorted and grouped.
+
+        During build-time templating this method is available as Jinja global function ``asset_table``,
+        limited to the assets of the current component, and ``asset_table_global`` for all assets.
+
+        Example::
+
+            table = finder.asset_table('asset.suffix == ".png"')
+            for vdd, group in table.group_by("vdd").items():
+                print(vdd, group.order_by("iout").assets)
+
+        :param condition: If given, only assets matching this condition are contained (see :func:`search_assets`).
+        :param components: A list of component names to search. If None (the default), all components will be searched.
+        """
+        if condition.strip():
+            assets = self.search_assets(condition, components)
+        else:
+            assets = AssetFinder.sort_assets(list(self.iter_assets(components)))
+        return AssetTable(assets)
+
+    def asset_query(self, condition: str = "", components: str | Iterable[str] | None = None) -> AssetQuery:
+        """
+        Returns a lazy, chainable :class:`AssetQuery <pharaoh.assetlib.table.AssetQuery>` on the discovered assets.
 
-        return AssetFinder.sort_assets(found)
+        During build-time templating this method is available as Jinja global function ``asset_query``,
+        limited to the assets of the current component, and ``asset_query_global`` for all assets.
+
+        Example::
+
+            query = finder.asset_query('asset.suffix == ".png"').where("vdd > 1").order_by("iout")
+            first_plot = query.first()
+
+        :param condition: An optional condition, see :func:`search_assets`
+        :param components: A list of component names to search. If None (the default), all components will be searched.
+        """
+        return AssetQuery(self, condition, components)
 
     def iter_assets(self, components: str | Iterable[str] | None = None) -> Iterator[Asset]:
         """
@@ -198,15 +807,23 @@ class AssetFinder:
         :param components: A list of component names to search. If None (the default), all components will be searched.
         :return: An iterator over all discovered assets.
         """
+        selected = self._select_components(components)
+        if self._recorders:
+            assets = [asset for component in selected for asset in self._assets[component]]
+            for recorder in self._recorders:
+                recorder.add_query("", _normalize_components(components), assets)
+            return iter(assets)
+        return (asset for component in selected for asset in self._assets[component])
+
+    def _select_components(self, components: str | Iterable[str] | None = None) -> list[str]:
+        self._sync()
         if not self._assets:
             self.discover_assets()
 
         if isinstance(components, str):
             components = [components]
         components = components or list(self._assets.keys())
-        for component in components:
-            if component in self._assets:
-                yield from self._assets[component]
+        return [component for component in components if component in self._assets]
 
     def get_asset_by_id(self, id: str) -> Asset | None:
         """
@@ -215,10 +832,49 @@ class AssetFinder:
         :param id: The ID of the asset to return
         :return: An :class:`Asset` instance if found, None otherwise.
         """
-        for asset in self.iter_assets():
-            if asset.id == id:
-                return asset
-        return None
+        self._sync()
+        if not self._assets:
+            self.discover_assets()
+        asset = self._by_id.get(id)
+        for recorder in self._recorders:
+            recorder.assets[id] = asset
+        return asset
+
+    def get_asset_by_stem(self, stem: str) -> Asset | None:
+        """
+        Returns the corresponding :class:`Asset` instance for a certain filename stem, e.g. ``myplot_3f2a1b4c``.
+
+        :param stem: The filename stem of the asset (or its ``*.assetinfo`` file) to return
+        :return: An :class:`Asset` instance if found, None otherwise.
+        """
+        self._sync()
+        if not self._assets:
+            self.discover_assets()
+        asset = self._by_stem.get(stem)
+        if asset is not None:
+            for recorder in self._recorders:
+                recorder.assets[asset.id] = asset
+        return asset
+
+    @contextlib.contextmanager
+    def record_lookups(self) -> Iterator[AssetLookups]:
+        """
+        Returns a context manager, that records all searches and lookups of assets done while it is active.
+
+        Used to track which assets a document depends on, so it is only rebuilt if they change.
+
+        Example::
+
+            with finder.record_lookups() as lookups:
+                finder.search_assets("label == 'my_plot'")
+            print(lookups.queries)
+        """
+        recorder = AssetLookups()
+        self._recorders.append(recorder)
+        try:
+            yield recorder
+        finally:
+            self._recorders.remove(recorder)
 
     @staticmethod
     def sort_assets(assets: list[Asset]) -> list[Asset]:
@@ -237,6 +893,69 @@ class AssetFinder:
         return sorted(assets, key=sort_key)
 
 
+class AssetLookups:
+    """
+    The asset searches and lookups recorded by :func:`AssetFinder.record_lookups`.
+
+    :ivar queries: Maps each searched (condition, components) tuple to the IDs of the found assets.
+        Listing all assets (e.g. via :func:`AssetFinder.iter_assets`) is recorded as empty condition.
+    :ivar assets: Maps the IDs of all found or looked-up assets to the :class:`Asset` instances.
+        IDs that were looked up but not found map to None.
+    """
+
+    __slots__ = ("assets", "queries")
+
+    def __init__(self):
+        self.queries: dict[tuple[str, tuple[str, ...] | None], frozenset[str]] = {}
+        self.assets: dict[str, Asset | None] = {}
+
+    def add_query(self, condition: str, components: tuple[str, ...] | None, assets: Iterable[Asset]):
+        ids = []
+        for asset in assets:
+            ids.append(asset.id)
+            self.assets[asset.id] = asset
+        self.queries[(condition, components)] = frozenset(ids)
+
+
+def _normalize_components(components: str | Iterable[str] | None) -> tuple[str, ...] | None:
+    if not components:
+        return None
+    if isinstance(components, str):
+        return (components,)
+    return tuple(components)
+
+
+def _pair_asset_files(directory: Path, names: Iterable[str]) -> dict[str, str]:
+    """
+    Maps the names of all ``*.assetinfo`` files inside a directory listing to the names of their asset files.
+
+    :param directory: The listed directory
+    :param names: The file names inside the directory
+
+    :raises AssetFileLinkBrokenError: If an asset file is missing.
+    """
+    info_names = []
+    by_stem: dict[str, str] = {}
+    for name in names:
+        if name.endswith(".assetinfo"):
+            info_names.append(name)
+        elif not name.endswith(FRAGMENT_SUFFIX):
+            by_stem.setdefault(name.rpartition(".")[0] or name, name)
+
+    pairs = {}
+    for info_name in info_names:
+        stem = info_name[: -len(".assetinfo")]
+        asset_name = by_stem.get(stem)
+        if asset_name is None:
+            # Asset files with multiple suffixes, like .tar.gz
+            asset_name = next((name for name in sorted(by_stem.values()) if name.startswith(stem)), None)
+        if asset_name is None:
+            msg = f"There is no asset for inventory file {directory / info_name}!"
+            raise AssetFileLinkBrokenError(msg)
+        pairs[info_name] = asset_name
+    return pairs
+
+
 def asset_groupby(
     seq: Iterable[Asset], key: str, sort_reverse: bool = False, default: str | None = None
 ) -> dict[str, list[Asset]]:
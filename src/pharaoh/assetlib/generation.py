@@ -360,7 +360,11 @@ def register_asset(
                 msg = f"{file} does not exist!"
                 raise FileNotFoundError(msg)
         info_file = context_stack.dump(asset_file_path)
-    return Asset(info_file)
+    asset = Asset(info_file)
+    if active_app._asset_finder is not None:
+        # The asset was already added to an existing asset finder by context_stack.dump
+        asset = active_app._asset_finder.add_asset(asset)
+    return asset
 
 
 def register_templating_context(name: str, context: str | Path | dict | list, metadata: dict | None = None, **kwargs):
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import copy
+import json
+import sys
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
+
+import omegaconf
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class MetadataView(Mapping):
+    """
+    A lightweight, read-only view on asset metadata.
+
+    Nested values can be accessed like attributes (``view.asset.suffix``) or items (``view["asset"]["suffix"]``),
+    so it can be used as namespace for search conditions and in templates the same way an
+    ``omegaconf.DictConfig`` is used.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: dict):
+        object.__setattr__(self, "_data", data)
+
+    def __getitem__(self, key):
+        return _wrap(self._data[key])
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):  # e.g. lookups of copy or pickle protocols
+            raise AttributeError(name)
+        try:
+            return _wrap(self._data[name])
+        except KeyError:
+            msg = f"Missing key {name}"
+            raise AttributeError(msg) from None
+
+    def __setattr__(self, name, value):
+        msg = f"{self.__class__.__name__} is read-only"
+        raise TypeError(msg)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        return repr(self._data)
+
+    def __reduce__(self):
+        return self.__class__, (self._data,)
+
+    def to_dict(self) -> dict:
+        """
+        Returns a deep copy of the metadata as plain dictionary.
+        """
+        return copy.deepcopy(self._data)
+
+
+def to_container(metadata: Mapping, resolve: bool = False) -> dict:
+    """
+    Returns asset metadata (:class:`MetadataView` or ``omegaconf.DictConfig``) as plain dictionary.
+
+    For a :class:`MetadataView` the underlying dictionary is returned without copying it, so it must not be modified.
+
+    :param metadata: The metadata to convert
+    :param resolve: Resolve OmegaConf interpolations
+    """
+    if isinstance(metadata, MetadataView):
+        return metadata._data
+    if isinstance(metadata, omegaconf.DictConfig):
+        return omegaconf.OmegaConf.to_container(metadata, resolve=resolve)  # type: ignore[return-value]
+    return dict(metadata)
+
+
+def _wrap(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MetadataView(value)
+    if isinstance(value, list):
+        return [_wrap(v) for v in value]
+    return value
+
+
+def _intern_keys(pairs: list[tuple[str, Any]]) -> dict:
+    return {sys.intern(key): value for key, value in pairs}
+
+
+def _has_interpolation(value: Any) -> bool:
+    if isinstance(value, str):
+        return "${" in value or value == "???"
+    if isinstance(value, dict):
+        return any(_has_interpolation(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_interpolation(v) for v in value)
+    return False
+
+
+def parse_metadata(text: str) -> dict:
+    """
+    Parses the content of an ``*.assetinfo`` file into a dictionary with interned keys,
+    since all assets share mostly the same keys.
+    """
+    return json.loads(text, object_pairs_hook=_intern_keys)
+
+
+def load_metadata(info_file: Path) -> MetadataView | omegaconf.DictConfig:
+    """
+    Loads the content of an ``*.assetinfo`` file as :class:`MetadataView`.
+
+    Metadata containing OmegaConf interpolations (``${...}``) are loaded as ``omegaconf.DictConfig`` instead,
+    so the interpolations are resolved on access.
+    """
+    data = parse_metadata(info_file.read_text())
+    if _has_interpolation(data):
+        return omegaconf.OmegaConf.create(data)
+    return MetadataView(data)
@@ -0,0 +1,579 @@
+from __future__ import annotations
+
+import ast
+import builtins
+import contextlib
+import functools
+import operator
+import os
+import pickle
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Union
+
+import omegaconf
+
+from pharaoh.log import log
+
+from .metadata import MetadataView, to_container
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+    from pathlib import Path
+
+# Increase if the layout of ComponentIndex changes, so outdated index files are discarded
+INDEX_VERSION = 2
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+# Names that resolve to builtins if the asset metadata does not contain them, so they can't be indexed
+_BUILTIN_NAMES = frozenset(dir(builtins))
+# Attributes that resolve to members of the metadata container instead of metadata keys
+_RESERVED_ATTRIBUTES = frozenset(dir(MetadataView)) | frozenset(dir(omegaconf.DictConfig))
+
+_COMPARISONS: dict[type[ast.cmpop], tuple[str, str]] = {
+    # operator: (name, name if operands are swapped)
+    ast.Lt: ("lt", "gt"),
+    ast.LtE: ("le", "ge"),
+    ast.Gt: ("gt", "lt"),
+    ast.GtE: ("ge", "le"),
+}
+
+# A predicate is a tuple (operation, dotted metadata path, argument)
+Predicate = tuple[str, str, Any]
+
+
+class UnsupportedConditionError(ValueError):
+    """
+    Raised if a (part of a) search condition can't be answered by the asset index and has to be evaluated using eval.
+    """
+
+
+class _Leaf:
+    __slots__ = ("code", "predicate")
+
+    def __init__(self, node: ast.expr):
+        self.code = compile(ast.fix_missing_locations(ast.Expression(body=node)), "<string>", "eval")
+        try:
+            self.predicate: Predicate | None = _compile_predicate(node)
+        except UnsupportedConditionError:
+            self.predicate = None
+
+
+class _And:
+    __slots__ = ("children",)
+
+    def __init__(self, children: list[_PlanNode]):
+        self.children = children
+
+
+class _Or:
+    __slots__ = ("children",)
+
+    def __init__(self, children: list[_PlanNode]):
+        self.children = children
+
+
+class _Not:
+    __slots__ = ("child",)
+
+    def __init__(self, child: _PlanNode):
+        self.child = child
+
+
+_PlanNode = Union[_Leaf, _And, _Or, _Not]
+
+
+@dataclass
+class QueryErrors:
+    """
+    Describes the items for which evaluating a search condition failed. Those items don't match the condition.
+
+    :ivar count: The number of items for which the evaluation failed
+    :ivar total: The number of searched items
+    :ivar message: The exception raised for the first failing item
+    """
+
+    count: int
+    total: int
+    message: str
+
+    def __str__(self):
+        return f"evaluation failed for {self.count} of {self.total} items, first error: {self.message}"
+
+
+class Query:
+    """
+    A search condition compiled into an execution plan for a :class:`ComponentIndex`.
+
+    Conditions are Python expressions that are evaluated using asset metadata as namespace.
+    Following parts of a condition are answered from the index, where ``field`` is a (nested) metadata key like
+    ``asset.suffix`` and ``value`` is a literal string, number, boolean or None:
+
+    - ``field == value``, ``field != value``, ``field < value`` (also ``<=``, ``>``, ``>=``)
+    - ``field is None``, ``field is not None``
+    - ``field in (value, ...)``, ``field not in (value, ...)``
+    - ``"key" in field``, ``"key" not in field`` (key exists in a nested mapping or substring of a string)
+    - ``field.startswith(value)``, ``field.endswith(value)`` (also with a tuple of strings)
+    - ``field`` (truthiness)
+
+    These can be combined using ``and``, ``or``, ``not`` and parentheses.
+    All other expressions are evaluated using ``eval``, but only for assets whose result still depends on them.
+
+    The results are identical to evaluating the whole condition using ``eval`` for each asset, where a failing
+    evaluation is treated as False.
+    To achieve this, the plan tracks for each part of the condition, for which assets it is truthy and for
+    which it fails, e.g. because of a missing metadata key. The failing assets are reported by :func:`run`.
+
+    Use :func:`compile_query` to create instances.
+    """
+
+    def __init__(self, condition: str):
+        self.condition = condition
+        tree = ast.parse(condition.strip(), mode="eval")
+        self._code = compile(tree, "<string>", "eval")
+        self._plan = _build_plan(tree.body)
+
+    @property
+    def is_indexed(self) -> bool:
+        """
+        True if the whole condition can be answered by the index, without using eval.
+        """
+        return all(leaf.predicate is not None for leaf in _iter_leaves(self._plan))
+
+    def execute(self, index: ComponentIndex | None, size: int, namespace: Callable[[int], Mapping]) -> set[int]:
+        """
+        Executes the plan and returns the positions of all matching items.
+
+        :param index: The index of the items. If None, the condition is evaluated using eval for each item.
+        :param size: The number of items
+        :param namespace: A function that returns the namespace (metadata) of an item, used for evaluation via eval.
+        """
+        true, _ = self.run(index, size, namespace)
+        return true
+
+    def run(
+        self, index: ComponentIndex | None, size: int, namespace: Callable[[int], Mapping]
+    ) -> tuple[set[int], QueryErrors | None]:
+        """
+        Like :func:`execute`, but also reports the items for which evaluating the condition failed.
+
+        :return: The positions of all matching items and the errors, or None if the evaluation succeeded for all items.
+        """
+        true, errors = _run(self._plan, set(range(size)), index, namespace)
+        if not errors:
+            return true, None
+        return true, QueryErrors(len(errors), size, self.error_message(namespace(min(errors))))
+
+    def error_message(self, namespace: Mapping) -> str:
+        """
+        Evaluates the condition using eval and returns the message of the raised exception, or an empty string.
+        """
+        try:
+            eval(self._code, {}, namespace)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+        return ""
+
+    def filter(self, namespaces: Sequence[Mapping]) -> list[int]:
+        """
+        Returns the positions of all namespaces matching the condition, in ascending order.
+
+        A temporary index is built for the namespaces, so this is meant for small collections that
+        don't have a persistent index, like component definitions. Failing evaluations are logged.
+        """
+        index = ComponentIndex(0, [""] * len(namespaces))
+        for position, namespace in enumerate(namespaces):
+            index.add(position, to_container(namespace))
+        true, errors = self.run(index, len(namespaces), namespaces.__getitem__)
+        if errors is not None:
+            log.debug(f"Condition {self.condition!r} was treated as False: {errors}")
+        return sorted(true)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_query(condition: str) -> Query:
+    """
+    Compiles a search condition into a :class:`Query`. The result is cached.
+
+    :param condition: The search condition, a Python expression
+    :raises SyntaxError: If the condition is not a valid Python expression
+    """
+    return Query(condition)
+
+
+def _build_plan(node: ast.expr) -> _PlanNode:
+    if isinstance(node, ast.BoolOp):
+        children = [_build_plan(value) for value in node.values]
+        return _And(children) if isinstance(node.op, ast.And) else _Or(children)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return _Not(_build_plan(node.operand))
+    return _Leaf(node)
+
+
+def _iter_leaves(node: _PlanNode) -> Iterable[_Leaf]:
+    if isinstance(node, _Leaf):
+        yield node
+    elif isinstance(node, _Not):
+        yield from _iter_leaves(node.child)
+    else:
+        for child in node.children:
+            yield from _iter_leaves(child)
+
+
+def _run(
+    node: _PlanNode, domain: set[int], index: ComponentIndex | None, namespace: Callable[[int], Mapping]
+) -> tuple[set[int], set[int]]:
+    """
+    Evaluates a plan node for all items in *domain*.
+
+    :return: The items for which the node is truthy and the items for which its evaluation fails.
+        All other items of the domain are falsy.
+    """
+    if not domain:
+        return set(), set()
+
+    if isinstance(node, _And):
+        # Like Python, later operands are only evaluated if all previous ones are truthy
+        true, errors = domain, set()
+        for child in node.children:
+            true, child_errors = _run(child, true, index, namespace)
+            errors |= child_errors
+        return true, errors
+
+    if isinstance(node, _Or):
+        # Like Python, later operands are only evaluated if all previous ones are falsy
+        remaining, true, errors = domain, set(), set()
+        for child in node.children:
+            child_true, child_errors = _run(child, remaining, index, namespace)
+            true |= child_true
+            errors |= child_errors
+            remaining = remaining - child_true - child_errors
+        return true, errors
+
+    if isinstance(node, _Not):
+        true, errors = _run(node.child, domain, index, namespace)
+        return domain - true - errors, errors
+
+    if node.predicate is None or index is None or not index.can_answer(node.predicate):
+        return _evaluate(node.code, domain, namespace)
+
+    true, errors, unknown = index.evaluate(node.predicate, domain)
+    unknown |= index.unindexed & domain
+    if unknown:
+        true -= unknown
+        errors -= unknown
+        evaluated_true, evaluated_errors = _evaluate(node.code, unknown, namespace)
+        true |= evaluated_true
+        errors |= evaluated_errors
+    return true, errors
+
+
+def _evaluate(code, domain: set[int], namespace: Callable[[int], Mapping]) -> tuple[set[int], set[int]]:
+    true, errors = set(), set()
+    for position in domain:
+        try:
+            if eval(code, {}, namespace(position)):
+                true.add(position)
+        except Exception:
+            errors.add(position)
+    return true, errors
+
+
+def _compile_predicate(node: ast.expr) -> Predicate:
+    if isinstance(node, ast.Compare) and len(node.ops) == 1:
+        left, op, right = node.left, node.ops[0], node.comparators[0]
+        if isinstance(op, (ast.Eq, ast.NotEq)):
+            try:
+                path, value = _field_path(left), _literal(right)
+            except UnsupportedConditionError:
+                path, value = _field_path(right), _literal(left)
+            return ("eq" if isinstance(op, ast.Eq) else "ne"), path, value
+        if type(op) in _COMPARISONS:
+            name, swapped = _COMPARISONS[type(op)]
+            try:
+                return name, _field_path(left), _literal(right)
+            except UnsupportedConditionError:
+                return swapped, _field_path(right), _literal(left)
+        if isinstance(op, (ast.Is, ast.IsNot)) and isinstance(right, ast.Constant) and right.value is None:
+            return ("eq" if isinstance(op, ast.Is) else "ne"), _field_path(left), None
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if isinstance(right, (ast.Tuple, ast.List, ast.Set)):
+                values = frozenset(_literal(elt) for elt in right.elts)
+                return ("in" if isinstance(op, ast.In) else "notin"), _field_path(left), values
+            key = _literal(left)
+            if isinstance(key, str):
+                return ("contains" if isinstance(op, ast.In) else "notcontains"), _field_path(right), key
+
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr in ("startswith", "endswith")
+        and len(node.args) == 1
+        and not node.keywords
+    ):
+        arg = _literal(node.args[0], allow_tuple=True)
+        if isinstance(arg, str):
+            arg = (arg,)
+        if not isinstance(arg, tuple) or not all(isinstance(a, str) for a in arg):
+            msg = f"{node.func.attr} is only supported with string arguments"
+            raise UnsupportedConditionError(msg)
+        return node.func.attr, _field_path(node.func.value), arg
+
+    return "truthy", _field_path(node), None
+
+
+def _field_path(node: ast.expr) -> str:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        if node.attr.startswith("_") or node.attr in _RESERVED_ATTRIBUTES:
+            msg = f"Attribute {node.attr!r} can't be looked up in the asset index"
+            raise UnsupportedConditionError(msg)
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name) or node.id in _BUILTIN_NAMES:
+        msg = "Expected a metadata field"
+        raise UnsupportedConditionError(msg)
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _literal(node: ast.expr, allow_tuple: bool = False) -> Any:
+    try:
+        value = ast.literal_eval(node)
+    except ValueError as e:
+        raise UnsupportedConditionError(str(e)) from e
+    if isinstance(value, _SCALAR_TYPES) or (allow_tuple and isinstance(value, tuple)):
+        return value
+    msg = f"Unsupported literal {value!r}"
+    raise UnsupportedConditionError(msg)
+
+
+class ComponentIndex:
+    """
+    An inverted index over the flattened metadata of all assets of a single component.
+
+    Assets are referenced by their position inside :attr:`names`, the list of their ``*.assetinfo`` file names.
+    """
+
+    def __init__(self, stamp: int, names: list[str]):
+        #: Modification time of the component directory at the time of indexing
+        self.stamp = stamp
+        self.names = names
+        #: Maps a metadata path to the scalar values and the assets that have them
+        self.values: dict[str, dict[Any, set[int]]] = {}
+        #: Maps a metadata path to the assets that have this path (scalar or container)
+        self.present: dict[str, set[int]] = {}
+        #: Maps a metadata path to the assets where it is truthy
+        self.truthy: dict[str, set[int]] = {}
+        #: Maps a metadata path to the assets where it is a list
+        self.lists: dict[str, set[int]] = {}
+        #: Paths that are scalars or lists. Accessing attributes on them can't be answered by the index.
+        self.terminal_paths: set[str] = set()
+        #: Assets whose metadata contain interpolations or unusual keys. They are always evaluated using eval.
+        self.unindexed: set[int] = set()
+
+    def add(self, position: int, metadata: dict):
+        if not self._add_mapping(position, "", metadata):
+            self.unindexed.add(position)
+
+    def _add_mapping(self, position: int, prefix: str, mapping: dict) -> bool:
+        ok = True
+        for key, value in mapping.items():
+            if not isinstance(key, str) or "." in key:
+                ok = False
+                continue
+            path = prefix + key
+            self.present.setdefault(path, set()).add(position)
+            if value:
+                self.truthy.setdefault(path, set()).add(position)
+            if isinstance(value, dict):
+                ok = self._add_mapping(position, path + ".", value) and ok
+            elif isinstance(value, list):
+                self.lists.setdefault(path, set()).add(position)
+                self.terminal_paths.add(path)
+            else:
+                if isinstance(value, str) and ("${" in value or value == "???"):
+                    ok = False  # OmegaConf would resolve these
+                self.terminal_paths.add(path)
+                self.values.setdefault(path, {}).setdefault(value, set()).add(position)
+        return ok
+
+    def can_answer(self, predicate: Predicate) -> bool:
+        """
+        Returns False if the metadata path of a predicate passes through a scalar or list in any asset.
+        Such attribute lookups (e.g. ``asset.index.real``) are evaluated using eval.
+        """
+        parts = predicate[1].split(".")
+        return not any(".".join(parts[:i]) in self.terminal_paths for i in range(1, len(parts)))
+
+    def evaluate(self, predicate: Predicate, domain: set[int]) -> tuple[set[int], set[int], set[int]]:
+        """
+        Evaluates a predicate for the assets in *domain*.
+
+        Positions of :attr:`unindexed` assets may be contained in the results and have to be re-evaluated.
+
+        :return: The assets for which the predicate is truthy, the assets for which evaluating it would raise an
+            exception (e.g. missing key) and the assets that can't be answered by the index.
+        """
+        op, path, arg = predicate
+        empty: set[int] = set()
+        values = self.values.get(path, {})
+        present = self.present.get(path, empty)
+        missing = domain - present
+
+        if op in ("eq", "ne", "in", "notin", "truthy"):
+            if op == "eq":
+                true = domain & values.get(arg, empty)
+            elif op == "ne":
+                true = (domain & present) - values.get(arg, empty)
+            elif op == "in":
+                true = domain.intersection(empty.union(*(values.get(v, empty) for v in arg)))
+            elif op == "notin":
+                true = (domain & present).difference(*(values.get(v, empty) for v in arg))
+            else:
+                true = domain & self.truthy.get(path, empty)
+            return true, missing, set()
+
+        if op in ("startswith", "endswith"):
+            true, strings = set(), set()
+            for value, assets in values.items():
+                if isinstance(value, str):
+                    strings |= assets
+                    if getattr(value, op)(arg):
+                        true |= assets
+            # Other types don't have these methods
+            return domain & true, domain - strings, set()
+
+        if op in ("lt", "le", "gt", "ge"):
+            compare = getattr(operator, op)
+            true, errors, scalars = set(), set(missing), set()
+            for value, assets in values.items():
+                scalars |= assets
+                try:
+                    if compare(value, arg):
+                        true |= assets
+                except TypeError:
+                    errors |= assets
+            # Containers can't be compared with scalars
+            errors |= (domain & present) - scalars
+            return domain & true, domain & errors, set()
+
+        if op in ("contains", "notcontains"):
+            true, errors, scalars = set(), set(missing), set()
+            for value, assets in values.items():
+                scalars |= assets
+                if not isinstance(value, str):
+                    errors |= assets  # e.g. "a" in 1
+                elif arg in value:
+                    true |= assets
+            lists = domain & self.lists.get(path, empty)
+            mappings = (domain & present) - scalars - lists
+            if "." not in arg:
+                true |= mappings & self.present.get(f"{path}.{arg}", empty)
+            true &= domain
+            errors &= domain
+            if op == "notcontains":
+                true = (domain & present) - true - errors - lists
+            return true, errors, lists
+
+        msg = f"Unknown operation {op!r}"
+        raise ValueError(msg)
+
+
+class AssetIndex:
+    """
+    A collection of :class:`ComponentIndex` instances, one per component,
+    that can be persisted to a file so consecutive processes don't need to re-index unchanged components.
+
+    :param path: The file to persist the index to. If None, the index is only kept in memory.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self._components: dict[str, ComponentIndex] = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        if self.path is None or not self.path.is_file():
+            return
+        try:
+            with open(self.path, "rb") as fp:
+                version, components = pickle.load(fp)
+        except Exception as e:
+            log.debug(f"Could not load asset index {self.path}: {e}")
+            return
+        if version == INDEX_VERSION:
+            self._components = components
+
+    def save(self):
+        if self.path is None or not self._dirty:
+            return
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as fp:
+                pickle.dump((INDEX_VERSION, self._components), fp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            log.debug(f"Could not save asset index {self.path}: {e}")
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+
+    def get(self, component: str) -> ComponentIndex | None:
+        return self._components.get(component)
+
+    def get_fresh(self, component: str, stamp: int, names: Iterable[str]) -> ComponentIndex | None:
+        """
+        Returns the index of a component if it was created for the same directory state, None otherwise.
+        """
+        index = self._components.get(component)
+        if index is not None and index.stamp == stamp and set(index.names) == set(names):
+            return index
+        return None
+
+    def build(self, component: str, stamp: int, entries: Iterable[tuple[str, dict]]) -> ComponentIndex:
+        """
+        (Re-)Indexes a component.
+
+        :param component: The component name
+        :param stamp: The modification time of the component directory
+        :param entries: Tuples of assetinfo file name and metadata dictionary
+        """
+        index = ComponentIndex(stamp, [])
+        for position, (name, metadata) in enumerate(entries):
+            index.names.append(name)
+            index.add(position, metadata)
+        self._components[component] = index
+        self._dirty = True
+        return index
+
+    def add(self, component: str, stamp: int, name: str, metadata: dict, position: int):
+        """
+        Adds a single asset to the index of a component.
+
+        :param component: The component name
+        :param stamp: The modification time of the component directory after the asset was added
+        :param name: The assetinfo file name
+        :param metadata: The metadata dictionary
+        :param position: The position of the asset inside the component's asset list
+        """
+        index = self._components.get(component)
+        if index is None or len(index.names) != position:
+            index = self._components[component] = ComponentIndex(stamp, [])
+            index.names.extend([""] * position)
+            index.unindexed.update(range(position))
+        index.stamp = stamp
+        index.names.append(name)
+        index.add(position, metadata)
+        self._dirty = True
+
+    def retain(self, components: Iterable[str]):
+        """
+        Removes all components from the index that are not in *components*.
+        """
+        components = set(components)
+        for component in list(self._components):
+            if component not in components:
+                del self._components[component]
+                self._dirty = True
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from .metadata import to_container
+from .query import ComponentIndex, compile_query
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+    from .finder import Asset, AssetFinder
+
+
+class _TableData:
+    """
+    The data shared by an :class:`AssetTable` and all tables derived from it.
+    """
+
+    def __init__(self, assets: Sequence[Asset]):
+        self.assets = list(assets)
+        self.index = ComponentIndex(0, [asset.infofile.name for asset in self.assets])
+        # The flattened metadata of each asset. Columns are built from these instead of the index values,
+        # since the index can't distinguish values that are equal and have the same hash, like 1, 1.0 and True.
+        self._rows: list[dict[str, Any]] = []
+        for position, asset in enumerate(self.assets):
+            metadata = to_container(asset.context)
+            self.index.add(position, metadata)
+            self._rows.append(_flatten(metadata))
+        self._columns: dict[str, list] | None = None
+
+    @property
+    def columns(self) -> dict[str, list]:
+        if self._columns is None:
+            columns: dict[str, list] = {}
+            for position, flat in enumerate(self._rows):
+                if position in self.index.unindexed:
+                    # Unindexed assets contain interpolations, which have to be resolved
+                    flat = _flatten(to_container(self.assets[position].context, resolve=True))
+                for path, value in flat.items():
+                    columns.setdefault(path, [None] * len(self.assets))[position] = value
+            self._columns = columns
+        return self._columns
+
+    def match(self, condition: str) -> set[int]:
+        query = compile_query(condition)
+        return query.execute(self.index, len(self.assets), lambda i: self.assets[i].context)
+
+
+class AssetTable:
+    """
+    A column-oriented table of the flattened metadata of a list of assets.
+
+    Each metadata value is a column named by its dotted path, e.g. ``asset.suffix``.
+    Filtering and grouping is done using an inverted index over the columns instead of evaluating
+    each asset's metadata separately.
+
+    All operations return new tables and don't modify the original one.
+    Iterating a table yields its :class:`Asset <pharaoh.assetlib.finder.Asset>` instances.
+
+    Usually created via :func:`AssetFinder.asset_table <pharaoh.assetlib.finder.AssetFinder.asset_table>`.
+    During build-time templating it is available as Jinja global function ``asset_table``.
+
+    Example:
+
+    .. code-block:: jinja
+
+        {% for vdd, table in asset_table("asset.suffix == '.png'").group_by("vdd").items() %}
+        {% for asset in table.order_by("iout") %}
+        ...
+    """
+
+    def __init__(self, assets: Sequence[Asset], _data: _TableData | None = None, _rows: list[int] | None = None):
+        """
+        :param assets: The assets to build the table from
+        """
+        self._data = _data if _data is not None else _TableData(assets)
+        self._rows = _rows if _rows is not None else list(range(len(self._data.assets)))
+
+    def _derive(self, rows: list[int]) -> AssetTable:
+        return AssetTable((), _data=self._data, _rows=rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[Asset]:
+        return (self._data.assets[row] for row in self._rows)
+
+    def __getitem__(self, item: int) -> Asset:
+        return self._data.assets[self._rows[item]]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[{len(self)} assets, {len(self.columns)} columns]"
+
+    @property
+    def assets(self) -> list[Asset]:
+        """
+        The assets of this table in table order.
+        """
+        return list(self)
+
+    @property
+    def columns(self) -> list[str]:
+        """
+        The names of all columns, which are the dotted paths of all scalar metadata values.
+        """
+        return sorted(self._data.columns)
+
+    def column(self, name: str, default: Any = None) -> list:
+        """
+        Returns the values of a column in table order.
+
+        :param name: The column name, e.g. ``asset.suffix``
+        :param default: The value for assets that don't have this metadata
+        """
+        column = self._data.columns.get(name)
+        if column is None:
+            return [default] * len(self._rows)
+        present = self._data.index.present.get(name, set())
+        return [column[row] if row in present else default for row in self._rows]
+
+    def where(self, condition: str) -> AssetTable:
+        """
+        Returns a table with all assets matching a condition.
+
+        :param condition: A Python expression, see :func:`AssetFinder.search_assets
+            <pharaoh.assetlib.finder.AssetFinder.search_assets>`.
+        """
+        if not condition.strip():
+            return self
+        matches = self._data.match(condition)
+        return self._derive([row for row in self._rows if row in matches])
+
+    def order_by(self, key: str = "asset.index", reverse: bool = False, default: Any = None) -> AssetTable:
+        """
+        Returns a table sorted by a column.
+
+        :param key: The column name
+        :param reverse: Sort descending
+        :param default: The sort value for assets that don't have this metadata. If None, they are sorted last.
+            If the values of a column can't be compared (mixed types), they are sorted by their string representation.
+        """
+        items = list(zip(self._rows, self.column(key, default)))
+
+        def sort_key(item, convert=None):
+            value = item[1]
+            if value is None:
+                return not reverse, 0
+            return reverse, value if convert is None else convert(value)
+
+        try:
+            ordered = sorted(items, key=sort_key, reverse=reverse)
+        except TypeError:  # mixed types
+            ordered = sorted(items, key=lambda item: sort_key(item, str), reverse=reverse)
+        return self._derive([row for row, _ in ordered])
+
+    def group_by(self, key: str, sort_reverse: bool = False, default: Any = None) -> dict[Any, AssetTable]:
+        """
+        Groups the table by the values of a column, like :func:`asset_groupby
+        <pharaoh.assetlib.finder.asset_groupby>`.
+
+        :param key: The column name
+        :param sort_reverse: Reverse-sort the keys in the returned dictionary
+        :param default: Sort each asset, that does not have this metadata, into this default group.
+            If None, such assets are skipped.
+        :return: A dictionary that maps the column values to tables
+        """
+        rows = set(self._rows)
+        index = self._data.index
+        # Unindexed assets contain interpolations, so their resolved values have to be taken from the column
+        unindexed = index.unindexed & rows
+        groups: dict[Any, set[int]] = {}
+        for value, positions in index.values.get(key, {}).items():
+            matches = (positions & rows) - unindexed
+            if matches:
+                groups[value] = matches
+        column = self._data.columns.get(key)
+        if column is not None:
+            for position in unindexed & index.present.get(key, set()):
+                groups.setdefault(column[position], set()).add(position)
+        if default is not None:
+            missing = rows.difference(*groups.values())
+            if missing:
+                groups.setdefault(default, set()).update(missing)
+
+        return {
+            value: self._derive([row for row in self._rows if row in groups[value]])
+            for value in _sorted_keys(groups, reverse=sort_reverse)
+        }
+
+    def first(self) -> Asset | None:
+        """
+        Returns the first asset of the table or None if the table is empty.
+        """
+        return self._data.assets[self._rows[0]] if self._rows else None
+
+    def to_dict(self) -> dict[str, list]:
+        """
+        Returns the table as dictionary that maps column names to lists of values in table order.
+        """
+        return {name: self.column(name) for name in self.columns}
+
+    def to_dataframe(self):
+        """
+        Returns the table as ``pandas.DataFrame``, indexed by the asset IDs. Requires pandas to be installed.
+        """
+        try:
+            import pandas as pd
+        except ImportError:
+            msg = "AssetTable.to_dataframe requires pandas to be installed!"
+            raise ImportError(msg) from None
+
+        return pd.DataFrame(self.to_dict(), index=pd.Index([asset.id for asset in self], name="id"))
+
+
+class AssetQuery:
+    """
+    A lazy, chainable query on the assets of an :class:`AssetFinder <pharaoh.assetlib.finder.AssetFinder>`.
+
+    Building the query does not touch any asset. All conditions passed to :func:`where` are fused into a single
+    condition, that is answered by one index-backed search (see :func:`AssetFinder.search_assets
+    <pharaoh.assetlib.finder.AssetFinder.search_assets>`) when the query is iterated.
+    Ordering and grouping are then done on an :class:`AssetTable` of the matches.
+    The result is kept until the finder's assets change.
+
+    Usually created via :func:`AssetFinder.asset_query <pharaoh.assetlib.finder.AssetFinder.asset_query>`.
+    During build-time templating it is available as Jinja global function ``asset_query``, limited to the assets
+    of the current component, and ``asset_query_global`` for all assets.
+
+    Example:
+
+    .. code-block:: jinja
+
+        {% set plots = asset_query("asset.suffix == '.png'").where("signal_name == 'idd'").order_by("iout") %}
+        {% for vdd, table in plots.group_by("vdd").items() %}
+        {% for asset in table %}
+        ...
+    """
+
+    def __init__(self, finder: AssetFinder, condition: str = "", components: str | Iterable[str] | None = None):
+        """
+        :param finder: The asset finder to search
+        :param condition: An optional initial condition, see :func:`where`
+        :param components: A list of component names to search. If None (the default), all components are searched.
+        """
+        self._finder = finder
+        self._components = components
+        self._conditions: tuple[str, ...] = (condition,) if condition.strip() else ()
+        self._order: tuple[str, bool, Any] | None = None
+        self._result: tuple[int, list[Asset]] | None = None
+
+    def _derive(self, conditions: tuple[str, ...], order: tuple[str, bool, Any] | None) -> AssetQuery:
+        query = AssetQuery(self._finder, components=self._components)
+        query._conditions = conditions
+        query._order = order
+        return query
+
+    @property
+    def condition(self) -> str:
+        """
+        The fused condition of all :func:`where` calls.
+        """
+        if len(self._conditions) == 1:
+            return self._conditions[0]
+        return " and ".join(f"({condition})" for condition in self._conditions)
+
+    def where(self, condition: str) -> AssetQuery:
+        """
+        Returns a query that additionally requires the assets to match a condition.
+
+        :param condition: A Python expression, see :func:`AssetFinder.search_assets
+            <pharaoh.assetlib.finder.AssetFinder.search_assets>`.
+        """
+        if not condition.strip():
+            return self
+        return self._derive((*self._conditions, condition), self._order)
+
+    def order_by(self, key: str = "asset.index", reverse: bool = False, default: Any = None) -> AssetQuery:
+        """
+        Returns a query whose results are sorted by a metadata value, replacing any previous ordering.
+
+        :param key: The dotted metadata path, e.g. ``asset.index``
+        :param reverse: Sort descending
+        :param default: The sort value for assets that don't have this metadata. If None, they are sorted last.
+        """
+        return self._derive(self._conditions, (key, reverse, default))
+
+    def _assets(self) -> list[Asset]:
+        self._finder._sync()
+        generation = self._finder._generation
+        if self._result is None or self._result[0] != generation:
+            if self._conditions:
+                assets = self._finder.search_assets(self.condition, self._components)
+            else:
+                assets = self._finder.sort_assets(list(self._finder.iter_assets(self._components)))
+            if self._order is not None:
+                key, reverse, default = self._order
+                assets = AssetTable(assets).order_by(key, reverse=reverse, default=default).assets
+            self._result = (self._finder._generation, assets)
+        return self._result[1]
+
+    def table(self) -> AssetTable:
+        """
+        Executes the query and returns the results as :class:`AssetTable`.
+        """
+        return AssetTable(self._assets())
+
+    def group_by(self, key: str, sort_reverse: bool = False, default: Any = None) -> dict[Any, AssetTable]:
+        """
+        Executes the query and groups the results by a metadata value, see :func:`AssetTable.group_by`.
+        The order of the query is kept inside each group.
+        """
+        return self.table().group_by(key, sort_reverse=sort_reverse, default=default)
+
+    def first(self) -> Asset | None:
+        """
+        Executes the query and returns the first asset or None if nothing matched.
+        """
+        assets = self._assets()
+        return assets[0] if assets else None
+
+    def __iter__(self) -> Iterator[Asset]:
+        return iter(self._assets())
+
+    def __len__(self) -> int:
+        return len(self._assets())
+
+    def __bool__(self) -> bool:
+        return bool(self._assets())
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[{self.condition!r}]"
+
+
+def _sorted_keys(keys, reverse: bool = False) -> list:
+    try:
+        return sorted(keys, key=lambda k: (k is None, k if k is not None else 0), reverse=reverse)
+    except TypeError:  # mixed types
+        return sorted(keys, key=str, reverse=reverse)
+
+
+def _flatten(mapping: dict, prefix: str = "") -> dict[str, Any]:
+    flat = {}
+    for key, value in mapping.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path + "."))
+        elif not isinstance(value, list):
+            flat[path] = value
+    return flat
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import contextlib
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pharaoh.log import log
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object  # type: ignore[assignment,misc]
+    Observer = None
+
+
+# The watchers whose observer thread is running
+_running_watchers: weakref.WeakSet[AssetWatcher] = weakref.WeakSet()
+
+
+@contextlib.contextmanager
+def paused_watchers() -> Iterator[None]:
+    """
+    Stops the observer threads of all running :class:`AssetWatcher` instances until the context is left,
+    e.g. while forking processes.
+    """
+    with contextlib.ExitStack() as stack:
+        for watcher in list(_running_watchers):
+            stack.enter_context(watcher.paused())
+        yield
+
+
+class _ComponentEventHandler(FileSystemEventHandler):  # type: ignore[misc,valid-type]
+    def __init__(self, watcher: AssetWatcher):
+        super().__init__()
+        self._watcher = watcher
+
+    def on_any_event(self, event):
+        for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if path:
+                self._watcher._mark(path)
+
+
+class AssetWatcher:
+    """
+    Tracks which components of an asset directory changed, so an :class:`AssetFinder
+    <pharaoh.assetlib.finder.AssetFinder>` can re-discover only those components.
+
+    If `watchdog <https://pypi.org/project/watchdog/>`_ is installed, file system events (e.g. inotify on Linux)
+    are used. Otherwise, the finder polls the modification times of the component directories,
+    at most once per *interval*.
+
+    Usually created via :func:`AssetFinder.watch <pharaoh.assetlib.finder.AssetFinder.watch>`.
+    """
+
+    def __init__(self, lookup_path: Path, interval: float = 1.0, use_watchdog: bool = True):
+        """
+        :param lookup_path: The asset directory, whose subdirectories are the components
+        :param interval: The minimum time in seconds between two polls, if polling is used
+        :param use_watchdog: Use file system events if watchdog is installed
+        """
+        self.lookup_path = Path(lookup_path)
+        self.interval = interval
+        self._use_watchdog = use_watchdog and Observer is not None
+        self._observer = None
+        self._lock = threading.Lock()
+        self._changed: set[str] = set()
+        # True if events may have been missed while the observer was paused
+        self._missed_events = False
+        self._last_poll = 0.0
+
+    @property
+    def backend(self) -> str:
+        """
+        Either "watchdog" or "polling".
+        """
+        return "watchdog" if self._observer is not None else "polling"
+
+    def start(self):
+        if not self._use_watchdog or self._observer is not None:
+            return
+        self.lookup_path.mkdir(parents=True, exist_ok=True)
+        observer = Observer()
+        observer.name = "pharaoh_asset_watcher"
+        observer.daemon = True
+        try:
+            observer.schedule(_ComponentEventHandler(self), str(self.lookup_path), recursive=True)
+            observer.start()
+        except OSError as e:  # e.g. inotify watch limit reached
+            log.debug(f"Cannot watch {self.lookup_path}, falling back to polling: {e}")
+            return
+        self._observer = observer
+        _running_watchers.add(self)
+
+    def stop(self):
+        _running_watchers.discard(self)
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    @contextlib.contextmanager
+    def paused(self) -> Iterator[None]:
+        """
+        Stops the observer thread until the context is left, e.g. while forking processes.
+        Since events may be missed meanwhile, all components have to be checked afterwards.
+        """
+        if self._observer is None:
+            yield
+            return
+        self.stop()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._missed_events = True
+            self.start()
+
+    def _mark(self, path: str):
+        try:
+            parts = Path(path).relative_to(self.lookup_path).parts
+        except ValueError:
+            return
+        if parts:
+            with self._lock:
+                self._changed.add(parts[0])
+
+    def pop_changes(self) -> set[str] | None:
+        """
+        Returns the components that may have changed since the last call.
+
+        :return: A set of component names, or None if all components have to be checked (polling)
+        """
+        with self._lock:
+            if self._missed_events:
+                self._missed_events = False
+                self._changed = set()
+                return None
+
+        if self._observer is None:
+            now = time.monotonic()
+            if now - self._last_poll < self.interval:
+                return set()
+            self._last_poll = now
+            return None
+
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        return changed
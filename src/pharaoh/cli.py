@@ -407,8 +407,14 @@ def generate(ctx, filters: list[str]):
 
 
 @cli.command()
+@click.option(
+    "--prerender",
+    is_flag=True,
+    default=False,
+    help="Render the Jinja templates of all documents in a process pool before Sphinx reads them.",
+)
 @click.pass_context
-def build(ctx):
+def build(ctx, prerender: bool):
     """
     Executes report generation for the current project.
 
@@ -416,15 +422,42 @@ def build(ctx):
 
     \b
         pharaoh build
+        pharaoh build --prerender
         pharaoh -p "path/to/my/project" build
     """
     project = ctx.obj["project"]
-    status = project.build_report()
+    status = project.build_report(prerender=prerender)
     if status != 0:
         msg = f"The Pharaoh build returned with non-zero exit code {status}.\nRefer to the log output for details!"
         raise Exception(msg)
 
 
+@cli.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="The host address to serve the report on.")
+@click.option("--port", default=8000, show_default=True, type=int, help="The port to serve the report on.")
+@click.option(
+    "-i", "--interval", default=0.5, show_default=True, type=float, help="Seconds between two checks for changes."
+)
+@click.pass_context
+def serve(ctx, host: str, port: int, interval: float):
+    """
+    Builds and serves the report and rebuilds it incrementally on changes.
+
+    Changed asset scripts are re-executed and only the documents of affected components are rebuilt.
+    Opened report pages are reloaded automatically. Stop the server with Ctrl+C.
+
+    Examples:
+
+    \b
+        pharaoh serve
+        pharaoh serve --port 8080
+    """
+    from pharaoh.serve import ReportServer
+
+    project = ctx.obj["project"]
+    ReportServer(project, host=host, port=port, interval=interval).serve_forever()
+
+
 @cli.command()
 @click.pass_context
 def show_report(ctx):
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import contextlib
 import datetime
 import functools
+import hashlib
+import json
 import logging
 import os
 import re
@@ -20,7 +23,7 @@ import omegaconf.errors
 import pharaoh
 import pharaoh.log
 import pharaoh.util.oc_resolvers
-from pharaoh.assetlib import finder, resource
+from pharaoh.assetlib import dedup, finder, query, resource
 from pharaoh.assetlib.context import context_stack
 from pharaoh.errors import AssetGenerationError, ProjectInconsistentError
 from pharaoh.plugins.plugin_manager import PM
@@ -31,6 +34,8 @@ if TYPE_CHECKING:
 
     import jinja2
 
+    from pharaoh.sphinx_app import PharaohSphinx
+
 try:
     PHARAOH_CLI_PATH = Path(shutil.which("pharaoh.exe")).as_posix()  # type: ignore[arg-type]
 except TypeError:
@@ -322,10 +327,28 @@ class PharaohProject:
     def asset_build_dir(self):
         return self.sphinx_report_project / ".asset_build"
 
+    @property
+    def asset_blob_dir(self):
+        return self.sphinx_report_project / ".asset_blobs"
+
+    @property
+    def asset_index_file(self):
+        return self.sphinx_report_project / ".asset_index"
+
+    @property
+    def jinja_cache_dir(self):
+        return self.sphinx_report_project / ".jinja_cache"
+
+    @property
+    def render_cache_dir(self):
+        return self.sphinx_report_project / ".render_cache"
+
     @property
     def asset_finder(self) -> finder.AssetFinder:
         if self._asset_finder is None:
-            self._asset_finder = finder.AssetFinder(self.asset_build_dir)
+            self._asset_finder = finder.AssetFinder(self.asset_build_dir, index_file=self.asset_index_file)
+            if self.get_setting("asset_gen.watch_assets", False):
+                self._asset_finder.watch()
         return self._asset_finder
 
     def add_component(
@@ -577,20 +600,17 @@ class PharaohProject:
 
            Example: ``name == "dummy" and metadata.foo in (1,2,3)``.
 
-           A failing evaluation will be treated as False. An empty expression will always match.
+           A failing evaluation will be treated as False and logged. An empty expression will always match.
+           The expression is executed as :class:`Query <pharaoh.assetlib.query.Query>`.
         """
-        found = []
-        for comp in self.iter_components(filtered=filtered):
-            if not expression:
-                found.append(comp)
-                continue
-            try:
-                result = eval(expression, {}, comp)
-            except Exception:
-                result = False
-            if result:
-                found.append(comp)
-        return found
+        components = list(self.iter_components(filtered=filtered))
+        if not expression:
+            return components
+        try:
+            compiled = query.compile_query(expression)
+        except Exception:
+            return []
+        return [components[i] for i in compiled.filter(components)]
 
     def filter_components(self, include: str | None = None, exclude: str | None = None):
         """
@@ -686,7 +706,7 @@ class PharaohProject:
             # List of patterns, relative to source directory, that match files and
             # directories to ignore when looking for source files.
             # This pattern also affects html_static_path and html_extra_path.
-            "exclude_patterns": [".asset_build", "**/asset_scripts"],
+            "exclude_patterns": [".asset_build", ".asset_blobs", ".jinja_cache", ".render_cache", "**/asset_scripts"],
             # Make sure the target is unique
             "autosectionlabel_prefix_document": True,
             # Latex Builder (PDF)
@@ -779,6 +799,9 @@ class PharaohProject:
             for cfilter in component_filters:
                 if re.match(cfilter, comp_name, re.IGNORECASE) is not None:
                     if comp_asset_build_dir.exists():
+                        if self._asset_finder is not None:
+                            # Keep the metadata of already discovered assets available
+                            self._asset_finder.load_metadata(comp_name)
                         shutil.rmtree(comp_asset_build_dir, ignore_errors=False)
 
                     cachedir = self.sphinx_report_project / ".resource_cache" / comp_name
@@ -803,6 +826,9 @@ class PharaohProject:
                         sources.append((comp_name, script))
                     break
 
+        # Blobs of deleted assets are not referenced anymore
+        dedup.remove_orphaned_blobs(self.asset_blob_dir)
+
         workers = self.get_setting("asset_gen.worker_processes", 0)
         if workers == 0:  # Run in same process - used for easier debugging
             results: list[tuple[Path, str | None]] = []
@@ -815,6 +841,9 @@ class PharaohProject:
         else:
             results = generate_assets_parallel(self.project_root, asset_sources=sources, workers=workers)
 
+        # Re-discover assets, which also updates the persistent asset index for following builds
+        self.asset_finder.discover_assets()
+
         msg = "At least one error occurred while asset script execution:\n"
         i = 1
         processed_asset_scripts = []
@@ -830,17 +859,17 @@ class PharaohProject:
 
         return processed_asset_scripts
 
-    def build_report(self, catch_errors=True) -> int:
+    def build_report(self, catch_errors=True, prerender=False) -> int:
         """
         Builds the Sphinx project and returns the status code.
 
         :param catch_errors: If True, Sphinx build errors will not raise an exception but return a -1 instead.
+        :param prerender: If True, the Jinja templates of all documents are rendered in a process pool before Sphinx
+            reads them.
         """
-        import multiprocessing
-
         from sphinx.util.docutils import docutils_namespace, patch_docutils
 
-        from pharaoh.sphinx_app import PharaohSphinx
+        from pharaoh.templating.second_level.prerender import prerendered
 
         builder = self.get_setting("report.builder")
         PM.pharaoh_build_started(self, builder)
@@ -849,57 +878,14 @@ class PharaohProject:
         with chdir(self.sphinx_report_project):
             pharaoh.log.log_version_info()
             log.info(f"Building Sphinx project using {builder.upper()} builder...")
-
-            resolved_settings = omegaconf.OmegaConf.create(
-                omegaconf.OmegaConf.merge(
-                    self._settings_map["default"],
-                    self._settings_map["project"],
-                    self._settings_map["env"],
-                )
-            )
-            omegaconf.OmegaConf.resolve(resolved_settings)
-            self.sphinx_report_build.mkdir(parents=True, exist_ok=True)
-            with open(self.sphinx_report_build / "pharaoh.resolved.yaml", "w") as fp:
-                omegaconf.OmegaConf.save(config=resolved_settings, f=fp)
+            self._save_resolved_settings()
 
             # Sphinx is used via its API instead of the CLI because we want to modify the info/warning stream
             try:
-                sourcedir = "."
-                confdir = sourcedir
-                outputdir = str(self.sphinx_report_build)
-                doctreedir = f"{outputdir}\\.doctrees"
-                confoverrides: dict | None = {}
-                status = pharaoh.log.SphinxLogRedirector(logging.DEBUG)
-                warning = pharaoh.log.SphinxLogRedirector(logging.WARNING)
-                freshenv = True
-                warningiserror = True
-                tags = None
-                verbosity = int(self.get_setting("report.verbosity", 0))
-                jobs = multiprocessing.cpu_count()
-                keep_going = True
-                pdb = False
-
-                with patch_docutils(confdir), docutils_namespace():
-                    app = PharaohSphinx(
-                        sourcedir,
-                        confdir,
-                        outputdir,
-                        doctreedir,
-                        builder,
-                        confoverrides,
-                        status,
-                        warning,
-                        freshenv,
-                        warningiserror,
-                        tags,
-                        verbosity,
-                        jobs,
-                        keep_going,
-                        pdb,
-                    )
-
-                    PM.pharaoh_sphinx_app_inited(app)
-                    app.build(force_all=False, filenames=None)
+                with patch_docutils("."), docutils_namespace():
+                    app = self._create_sphinx_app(builder)
+                    with prerendered(app) if prerender else contextlib.nullcontext():
+                        app.build(force_all=False, filenames=None)
                     if app.statuscode:
                         log.error(
                             f"Sphinx build finished with non-zero exit code {app.statuscode}. "
@@ -921,6 +907,65 @@ class PharaohProject:
                     raise
                 return -1
 
+    def _save_resolved_settings(self):
+        resolved_settings = omegaconf.OmegaConf.create(
+            omegaconf.OmegaConf.merge(
+                self._settings_map["default"],
+                self._settings_map["project"],
+                self._settings_map["env"],
+            )
+        )
+        omegaconf.OmegaConf.resolve(resolved_settings)
+        self.sphinx_report_build.mkdir(parents=True, exist_ok=True)
+        with open(self.sphinx_report_build / "pharaoh.resolved.yaml", "w") as fp:
+            omegaconf.OmegaConf.save(config=resolved_settings, f=fp)
+
+    def _create_sphinx_app(self, builder: str) -> PharaohSphinx:
+        """
+        Creates the Sphinx application for the report project.
+
+        Must be called inside the report project directory and within Sphinx' ``patch_docutils`` and
+        ``docutils_namespace`` context managers.
+        """
+        import multiprocessing
+
+        from pharaoh.sphinx_app import PharaohSphinx
+
+        sourcedir = "."
+        confdir = sourcedir
+        outputdir = str(self.sphinx_report_build)
+        doctreedir = str(self.sphinx_report_build / ".doctrees")
+        confoverrides: dict | None = {}
+        status = pharaoh.log.SphinxLogRedirector(logging.DEBUG)
+        warning = pharaoh.log.SphinxLogRedirector(logging.WARNING)
+        freshenv = bool(self.get_setting("report.fresh_env", False))
+        warningiserror = True
+        tags = None
+        verbosity = int(self.get_setting("report.verbosity", 0))
+        jobs = multiprocessing.cpu_count()
+        keep_going = True
+        pdb = False
+
+        app = PharaohSphinx(
+            sourcedir,
+            confdir,
+            outputdir,
+            doctreedir,
+            builder,
+            confoverrides,
+            status,
+            warning,
+            freshenv,
+            warningiserror,
+            tags,
+            verbosity,
+            jobs,
+            keep_going,
+            pdb,
+        )
+        PM.pharaoh_sphinx_app_inited(app)
+        return app
+
     def open_report(self):  # pragma: no cover
         """
         Opens the generated report (if possible, e.g. for local HTML reports).
@@ -1080,7 +1125,11 @@ class PharaohProject:
             "/log*.txt",
             "/report-build",
             "/report-project/.asset_build",
+            "/report-project/.asset_blobs",
+            "/report-project/.asset_index",
             "/report-project/.resource_cache",
+            "/report-project/.jinja_cache",
+            "/report-project/.render_cache",
             "/*.zip",
             "/*.idea",
         ]
@@ -1139,22 +1188,52 @@ class PharaohProject:
 
         env.globals["get_setting"] = self.get_setting
         env.globals["search_assets_global"] = self.asset_finder.search_assets
+        env.globals["asset_table_global"] = self.asset_finder.asset_table
+        env.globals["asset_query_global"] = self.asset_finder.asset_query
         env.globals["search_error_assets_global"] = search_error_assets_global
 
     def _build_asset_filepath(self, file: PathLike, component_name: str | None = None) -> Path:
         """
         Returns a new file name inside the asset build directory with the same filename as the input file,
-        except its file stem is suffixed with a unique uuid4 hash (first 8 chars).
+        except its file stem is suffixed with a unique hash (8 chars).
+
+        By default, the hash is random (uuid4).
+        If setting ``asset_gen.deterministic_names`` is enabled, the hash is derived from the component name,
+        the asset script, the index of the asset inside the script and the input filename instead.
+        So regenerated assets keep their file names (and IDs), as long as the asset scripts are unchanged.
 
         E.g. `foo/bar/iris_scatter_plot.html` --> `<asset-build-dir>/<component_name>/iris_scatter_plot_ab8b4081.html`
         """
         file = Path(file)
         try:
-            component = component_name or context_stack.get_parent_context("generate_assets")["asset"]["component_name"]
+            asset_context = context_stack.get_parent_context("generate_assets")["asset"]
         except Exception:
+            asset_context = {}
+        try:
+            component = component_name or asset_context["component_name"]
+        except KeyError:
             component = "unknown_component"
-        (self.asset_build_dir / component).mkdir(parents=True, exist_ok=True)
-        return self.asset_build_dir / component / f"{file.stem}_{str(uuid.uuid4())[:8]}{file.suffix}"
+        component_dir = self.asset_build_dir / component
+        component_dir.mkdir(parents=True, exist_ok=True)
+        if not self.get_setting("asset_gen.deterministic_names", False):
+            return component_dir / f"{file.stem}_{str(uuid.uuid4())[:8]}{file.suffix}"
+
+        script = asset_context.get("script_path")
+        if script:
+            script = Path(script)
+            with contextlib.suppress(ValueError):
+                script = script.relative_to(self.project_root)
+            script = script.as_posix()
+        key = [component, script, asset_context.get("index"), file.name]
+        attempt = 0
+        while True:
+            digest = hashlib.md5(json.dumps([*key, attempt], default=str).encode()).hexdigest()[:8]
+            asset_file = component_dir / f"{file.stem}_{digest}{file.suffix}"
+            # The same key is used more than once, e.g. if a file name is registered multiple times outside
+            # of asset scripts, or if an asset export failed before the asset index was incremented.
+            if not asset_file.exists() and not (component_dir / f"{asset_file.stem}.assetinfo").exists():
+                return asset_file
+            attempt += 1
 
 
 @attrs.define(frozen=True, slots=False)
@@ -0,0 +1,288 @@
+"""
+A development server, that keeps a Pharaoh project and its Sphinx application in memory, watches the report project
+for changes and incrementally re-generates assets and rebuilds the affected documents.
+Connected browsers are reloaded after each rebuild.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import http.server
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pharaoh.log import log
+from pharaoh.util.contextlib_chdir import chdir
+
+if TYPE_CHECKING:
+    from pharaoh.project import PharaohProject
+    from pharaoh.sphinx_app import PharaohSphinx
+
+RELOAD_PATH = "/__pharaoh_reload__"
+
+RELOAD_SCRIPT = f"""
+<script>
+new EventSource("{RELOAD_PATH}").onmessage = function() {{ window.location.reload(); }};
+</script>
+"""
+
+
+class _ReportRequestHandler(http.server.SimpleHTTPRequestHandler):
+    server: _ReportHTTPServer
+
+    def log_message(self, format, *args):
+        log.debug(f"{self.address_string()} - {format % args}")
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self._stream_reload_events()
+            return
+
+        path = Path(self.translate_path(self.path))
+        if path.is_dir():
+            path = path / "index.html"
+        if path.suffix != ".html" or not path.is_file() or not self.path.split("?")[0].endswith(("/", ".html")):
+            super().do_GET()
+            return
+
+        content = path.read_bytes()
+        head, sep, tail = content.rpartition(b"</body>")
+        content = head + RELOAD_SCRIPT.encode() + sep + tail if sep else content + RELOAD_SCRIPT.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _stream_reload_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        generation = self.server.generation
+        while not self.server.stopping:
+            with self.server.condition:
+                self.server.condition.wait_for(
+                    lambda generation=generation: self.server.generation != generation or self.server.stopping,
+                    timeout=15,
+                )
+            try:
+                if self.server.generation != generation:
+                    generation = self.server.generation
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+            except OSError:  # Browser tab was closed
+                return
+
+
+class _ReportHTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], directory: Path):
+        super().__init__(address, functools.partial(_ReportRequestHandler, directory=str(directory)))
+        self.generation = 0
+        self.stopping = False
+        self.condition = threading.Condition()
+
+    def notify_reload(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def shutdown(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        super().shutdown()
+
+
+class ReportServer:
+    """
+    Serves the report of a Pharaoh project and keeps it up to date while its sources are edited.
+
+    After an initial build, the report project is polled for changes:
+
+    - Changed asset scripts are re-executed (in a separate process) after their previously generated assets
+      are deleted. Only the documents of the components whose assets changed are rebuilt.
+      Assets generated by other processes (e.g. ``pharaoh generate``) are picked up as well.
+    - Changed files inside a component directory (templates, context files, ...) rebuild the documents
+      of the component.
+    - Any other changed file inside the report project rebuilds all documents.
+
+    The Sphinx application is kept in memory and only re-reads the affected documents.
+    Served HTML pages are reloaded by the browser after each rebuild.
+
+    Only supports HTML builders.
+    """
+
+    def __init__(self, project: PharaohProject, host: str = "127.0.0.1", port: int = 8000, interval: float = 0.5):
+        """
+        :param project: The Pharaoh project to serve
+        :param host: The host address to serve on
+        :param port: The port to serve on. Use 0 to select a free port.
+        :param interval: The time in seconds between two polls for changes
+        """
+        self.project = project
+        self.interval = interval
+        self.app: PharaohSphinx | None = None
+        self._exit_stack = contextlib.ExitStack()
+        self._snapshot: dict[Path, int] = {}
+        self._outdated: set[str] | None = set()  # None means all documents
+        self.project.sphinx_report_build.mkdir(parents=True, exist_ok=True)
+        self._httpd = _ReportHTTPServer((host, port), self.project.sphinx_report_build)
+        self._http_thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        """
+        Builds the report and starts serving it in a background thread.
+        """
+        from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+        self._snapshot = self._take_snapshot()
+        self.project.asset_finder.discover_assets()
+        self._exit_stack.enter_context(chdir(self.project.sphinx_report_project))
+        self._exit_stack.enter_context(patch_docutils("."))
+        self._exit_stack.enter_context(docutils_namespace())
+        self.project._save_resolved_settings()
+        self.app = self.project._create_sphinx_app(self.project.get_setting("report.builder"))
+        self.app.connect("env-get-outdated", self._get_outdated_docs)
+        self._build()
+
+        self._http_thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._http_thread.start()
+        log.info(f"Serving report at {self.url}")
+
+    def stop(self):
+        """
+        Stops serving the report.
+        """
+        if self._http_thread is not None:
+            self._httpd.shutdown()
+            self._http_thread.join()
+            self._http_thread = None
+        self._httpd.server_close()
+        self._exit_stack.close()
+
+    def serve_forever(self):
+        """
+        Starts the server and rebuilds the report on changes, until interrupted by the user (Ctrl+C).
+        """
+        self.start()
+        try:
+            while True:
+                time.sleep(self.interval)
+                self.poll()
+        except KeyboardInterrupt:
+            log.info("Stopping server...")
+        finally:
+            self.stop()
+
+    def poll(self) -> bool:
+        """
+        Checks the report project for changes once and rebuilds the report if required.
+
+        :return: True if the report was rebuilt
+        """
+        snapshot = self._take_snapshot()
+        changed = {
+            path for path in snapshot.keys() | self._snapshot.keys() if snapshot.get(path) != self._snapshot.get(path)
+        }
+        self._snapshot = snapshot
+
+        components_dir = self.project.sphinx_report_project_components
+        scripts = []
+        for path in sorted(changed):
+            try:
+                parts = path.relative_to(components_dir).parts
+            except ValueError:
+                parts = ()
+            if len(parts) > 2 and parts[1] == "asset_scripts":
+                scripts.append((parts[0], path))
+            elif len(parts) > 1:
+                self._mark_outdated(parts[0])
+            else:
+                self._outdated = None
+
+        if scripts:
+            self._regenerate_assets(scripts)
+        for component in self.project.asset_finder.refresh():
+            self._mark_outdated(component)
+
+        if self._outdated is not None and not self._outdated:
+            return False
+        self._build()
+        return True
+
+    def _take_snapshot(self) -> dict[Path, int]:
+        snapshot = {}
+        for root, dirs, files in os.walk(self.project.sphinx_report_project):
+            # Skip hidden directories like .asset_build or caches
+            dirs[:] = [d for d in dirs if not d.startswith(".") and d != "__pycache__"]
+            for name in files:
+                if name.endswith(".rendered"):
+                    continue
+                path = Path(root) / name
+                with contextlib.suppress(OSError):
+                    snapshot[path] = path.stat().st_mtime_ns
+        return snapshot
+
+    def _mark_outdated(self, component: str):
+        if self._outdated is not None:
+            self._outdated.add(component)
+
+    def _regenerate_assets(self, scripts: list[tuple[str, Path]]):
+        from pharaoh.assetlib.generation import generate_assets_parallel
+
+        finder = self.project.asset_finder
+        for component, script in scripts:
+            for asset in list(finder.iter_assets(component)):
+                if Path(str(asset.context.get("asset", {}).get("script_path", ""))) != script:
+                    continue
+                for path in (asset.infofile, asset.assetfile, asset.fragmentfile):
+                    if path.is_dir():
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        path.unlink(missing_ok=True)
+
+        existing = [(component, script) for component, script in scripts if script.is_file()]
+        if not existing:
+            return
+        log.info(f"Re-generating assets of {len(existing)} asset script(s)...")
+        # Asset scripts are executed in separate processes, so this process' project and modules stay untouched
+        workers = min(len(existing), os.cpu_count() or 1)
+        for script, error in generate_assets_parallel(self.project.project_root, existing, workers=workers):
+            if error:
+                log.error(f"Error while executing asset script {script}:\n{error}")
+
+    def _get_outdated_docs(self, app, env, added, changed, removed) -> list[str]:
+        outdated = self._outdated
+        self._outdated = set()
+        if outdated is None:
+            return sorted(env.found_docs)
+        prefixes = tuple(f"components/{component}/" for component in outdated)
+        return sorted(docname for docname in env.found_docs if docname.startswith(prefixes))
+
+    def _build(self):
+        assert self.app is not None
+        start = time.perf_counter()
+        try:
+            self.app.pharaoh_te.copy_shared_assets(self.app)
+            self.app.build(force_all=False, filenames=None)
+        except Exception:
+            log.error("Errors occurred during Sphinx build:", exc_info=True)
+        self._outdated = set()
+        log.info(f"Report rebuilt in {time.perf_counter() - start:.1f}s (status {self.app.statuscode})")
+        self._httpd.notify_reload()
@@ -21,10 +21,9 @@ class PharaohSphinx(Sphinx):
     Set by entrypoint of Sphinx plugin ...jinja_ext.setup()
     """
 
-    seen_warnings: t.ClassVar = set()
+    pharaoh_read_docs: set[str]
     """
-    Set of warnings that have been seen already. Used to avoid duplicate warnings.
-    Added by PharaohAssetDirective.
+    The documents read by the current build. Set by ...asset_ext.remember_read_docs().
     """
 
     @property
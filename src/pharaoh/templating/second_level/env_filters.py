@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Mapping
 from pathlib import Path
 
 import omegaconf
 from jinja2.exceptions import UndefinedError
 from jinja2.utils import is_undefined
 
+from pharaoh.assetlib.metadata import MetadataView
+
 DEFAULT = object()
 
 
@@ -40,10 +43,12 @@ def or_default(value, default):
     return value or default
 
 
-def oc_resolve(value: omegaconf.DictConfig):
+def oc_resolve(value: omegaconf.DictConfig | Mapping):
     """
-    Recursively converts an OmegaConf config to a primitive container (dict or list) and returns it.
+    Recursively converts an OmegaConf config or asset metadata to a primitive container (dict or list) and returns it.
     """
+    if isinstance(value, MetadataView):
+        return value.to_dict()
     conf = value.copy()
     return omegaconf.OmegaConf.to_container(conf, resolve=True)
 
@@ -91,7 +96,7 @@ def to_path(path: str) -> Path:
 def hasattr_(obj, name):
     _hasattr = hasattr(obj, name)
     _haskey = False
-    if isinstance(obj, (dict, omegaconf.DictConfig)):
+    if isinstance(obj, (Mapping, omegaconf.DictConfig)):
         _haskey = name in obj
     return _hasattr or _haskey
 
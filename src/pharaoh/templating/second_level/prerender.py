@@ -0,0 +1,135 @@
+"""
+Renders the Jinja templates of all documents in a process pool before Sphinx reads them (``pharaoh build --prerender``).
+
+The rendered documents are stored in the render cache, so Sphinx picks them up when reading the documents
+instead of rendering them again.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pharaoh.assetlib.watch import paused_watchers
+from pharaoh.log import log
+
+from .render_cache import RenderCache
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from pharaoh.sphinx_app import PharaohSphinx
+
+INCLUDE_PATTERN = re.compile(r"^\s*\.\. include::\s*(\S+)", re.MULTILINE)
+
+# Holds the Sphinx application of the build inside the worker processes, see _init_worker
+_worker_state: dict[str, PharaohSphinx] = {}
+
+
+def find_source_files(app: PharaohSphinx) -> list[Path]:
+    """
+    Returns the source files of all documents Sphinx would read.
+    """
+    exclude_paths = [*app.config.exclude_patterns, *app.config.templates_path, "**/_sources", ".#*", "**/.#*"]
+    docnames = app.project.discover(exclude_paths, app.config.include_patterns)
+    return sorted(Path(app.env.doc2path(docname)) for docname in docnames)
+
+
+def _init_worker(app: PharaohSphinx):
+    # Passed to the forked worker processes without pickling
+    _worker_state["app"] = app
+
+
+def _render_files(files: list[Path]) -> list[str]:
+    """
+    Renders the files and the files they include. Executed in the worker processes.
+
+    :return: A list of error messages
+    """
+    app = _worker_state["app"]
+    template_env = app.pharaoh_te
+    errors = []
+    queue = list(reversed(files))
+    seen = set()
+    while queue:
+        file = queue.pop()
+        if file in seen or not file.is_file():
+            continue
+        seen.add(file)
+        try:
+            rendered, _ = template_env.render_file(file)
+        except Exception as e:
+            errors.append(f"{file}: {e!r}")
+            continue
+        for match in INCLUDE_PATTERN.finditer(rendered):
+            include = match.group(1)
+            # Normalize the same way as Sphinx passes included files to PharaohTemplateEnv.sphinx_include_read_hook
+            if include.startswith("/"):
+                include_path = Path(os.path.normpath(Path(app.srcdir) / include.lstrip("/")))
+            else:
+                include_path = Path(os.path.normpath(file.parent / include))
+            queue.append(include_path)
+    template_env.rendered_file_writer.flush()
+    return errors
+
+
+@contextlib.contextmanager
+def prerendered(app: PharaohSphinx, workers: int | None = None) -> Iterator[None]:
+    """
+    Renders all documents of a Sphinx application in a process pool and keeps the results in the render cache,
+    until the context is left.
+
+    If setting ``report.render_cache`` is disabled, a temporary render cache is used for this build only.
+    Requires the "fork" start method (not available on Windows), otherwise prerendering is skipped.
+
+    Forking while other threads hold locks (e.g. of the logging module) can deadlock the worker processes, so the
+    background threads of Pharaoh (writing rendered files, watching assets) are stopped while the pool is running.
+    If any of them is still running (e.g. writing the rendered files of another build), prerendering is skipped.
+
+    :param app: The Sphinx application, that is about to build
+    :param workers: The number of worker processes. Defaults to the number of CPUs.
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        log.warning("Prerendering requires the 'fork' start method, which is not available on this platform.")
+        yield
+        return
+
+    template_env = app.pharaoh_te
+    original_cache = template_env.render_cache
+    with contextlib.ExitStack() as stack:
+        with paused_watchers():
+            template_env.rendered_file_writer.shutdown()
+            threads = [thread.name for thread in threading.enumerate() if thread.name.startswith("pharaoh_")]
+            if threads:
+                log.warning(f"Prerendering skipped, because background threads are running: {', '.join(threads)}")
+            else:
+                if original_cache is None:
+                    tmpdir = stack.enter_context(tempfile.TemporaryDirectory(prefix="pharaoh_prerender_"))
+                    template_env.render_cache = RenderCache(Path(tmpdir), fingerprint="prerender")
+                stack.callback(setattr, template_env, "render_cache", original_cache)
+                _prerender(app, workers)
+        yield
+
+
+def _prerender(app: PharaohSphinx, workers: int | None):
+    files = find_source_files(app)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    chunks = [files[i::workers] for i in range(workers)]
+    log.info(f"Prerendering {len(files)} documents using {workers} processes...")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context("fork"), initializer=_init_worker, initargs=(app,)
+    ) as pool:
+        for errors in pool.map(_render_files, chunks):
+            for error in errors:
+                # The document is rendered again by Sphinx, which reports the error properly
+                log.warning(f"Prerendering failed for {error}")
+    log.info(f"Prerendered documents in {time.perf_counter() - start:.1f}s")
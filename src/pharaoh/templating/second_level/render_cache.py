@@ -0,0 +1,126 @@
+"""
+A persistent cache for the output of build-time templating, enabled via setting ``report.render_cache``.
+
+Each rendered source file is stored together with a fingerprint of everything its rendering depended on:
+
+- the project settings, ``conf.py``, the template search paths and the Pharaoh version,
+- the content of all loaded templates (the source file itself, includes, imports and macros) and local context files,
+- the asset searches and assets used during rendering (see :class:`~.sphinx_ext.dependencies.DocumentDependencies`).
+
+A cached result is only used if all of them are unchanged.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pharaoh.log import log
+
+from .sphinx_ext.dependencies import DocumentDependencies
+
+if TYPE_CHECKING:
+    from pharaoh.assetlib.finder import AssetFinder
+
+RENDER_CACHE_VERSION = 2
+
+
+@dataclass
+class RenderRecord:
+    """
+    Collects the files and assets a single rendering depends on and the IDs of the assets it copied to the build
+    directory.
+    """
+
+    files: set[str] = field(default_factory=set)
+    dependencies: DocumentDependencies = field(default_factory=DocumentDependencies)
+    copied_assets: set[str] = field(default_factory=set)
+
+
+@dataclass
+class RenderCacheEntry:
+    fingerprint: str
+    files: dict[str, str]  # Maps file paths to the MD5 hash of their content
+    dependencies: DocumentDependencies
+    rendered: str
+    copied_assets: frozenset[str] = frozenset()
+
+
+def _file_hash(path: str) -> str | None:
+    try:
+        with open(path, "rb") as fp:
+            return hashlib.md5(fp.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class RenderCache:
+    """
+    Stores rendered source files in a directory, one file per source.
+
+    Entries are written atomically, so the cache can be used by parallel Sphinx read processes.
+    """
+
+    def __init__(self, directory: Path, fingerprint: str):
+        """
+        :param directory: The cache directory
+        :param fingerprint: A hash of everything that affects all renderings, e.g. the project settings
+        """
+        self.directory = Path(directory)
+        self.fingerprint = fingerprint
+
+    def _entry_path(self, source: Path) -> Path:
+        return self.directory / (hashlib.md5(str(Path(source).absolute()).encode()).hexdigest() + ".pickle")
+
+    def get(self, source: Path, finder: AssetFinder) -> RenderCacheEntry | None:
+        """
+        Returns the cached rendering of a source file, or None if there is none or it is outdated.
+        """
+        try:
+            with open(self._entry_path(source), "rb") as fp:
+                version, entry = pickle.load(fp)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.debug(f"Could not load render cache entry of {source}: {e}")
+            return None
+
+        if version != RENDER_CACHE_VERSION or entry.fingerprint != self.fingerprint:
+            return None
+        for path, file_hash in entry.files.items():
+            if _file_hash(path) != file_hash:
+                return None
+        if entry.dependencies.is_outdated(finder, {}):
+            return None
+        return entry
+
+    def put(self, source: Path, record: RenderRecord, rendered: str):
+        """
+        Stores the rendering of a source file.
+        """
+        files = {path: _file_hash(path) for path in sorted(record.files)}
+        if None in files.values():
+            return
+        entry = RenderCacheEntry(
+            self.fingerprint,
+            files,  # type: ignore[arg-type]
+            record.dependencies,
+            rendered,
+            frozenset(record.copied_assets),
+        )
+        path = self._entry_path(source)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as fp:
+                pickle.dump((RENDER_CACHE_VERSION, entry), fp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.debug(f"Could not save render cache entry of {source}: {e}")
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
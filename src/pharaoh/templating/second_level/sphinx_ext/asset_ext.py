@@ -19,7 +19,8 @@ import pharaoh
 import pharaoh.project
 from pharaoh.templating.second_level.util import asset_rel_path_from_build, asset_rel_path_from_project
 
-from .asset_tmpl import render_asset_template
+from . import dependencies
+from .asset_tmpl import asset_template_defaults, fill_asset_fragment, load_asset_fragment, render_asset_template
 
 if TYPE_CHECKING:
     from pharaoh.sphinx_app import PharaohSphinx
@@ -32,20 +33,38 @@ class PharaohDirectiveError(Exception):
 
 
 def setup(app: PharaohSphinx):
-    app.pharaoh_proj = pharaoh.project.PharaohProject(os.path.dirname(app.confdir))
+    app.pharaoh_proj = _get_project(os.path.dirname(app.confdir))
     setup.app = app  # type: ignore[attr-defined]
     setup.config = app.config  # type: ignore[attr-defined]
     setup.confdir = app.confdir  # type: ignore[attr-defined]
     app.add_directive("pharaoh-asset", PharaohAssetDirective)
     app.add_directive("pharao-asset", PharaohAssetDirective)
+    app.connect("env-before-read-docs", prefetch_directive_filters)
+    app.connect("env-purge-doc", dependencies.purge_doc)
+    app.connect("env-merge-info", dependencies.merge_info)
+    app.connect("env-get-outdated", dependencies.get_outdated)
+    app.connect("env-before-read-docs", remember_read_docs)
+    app.connect("env-purge-doc", purge_asset_warnings)
+    app.connect("env-merge-info", merge_asset_warnings)
+    app.connect("env-updated", emit_asset_warnings)
 
     return {
         "parallel_read_safe": True,
         "parallel_write_safe": True,
         "version": pharaoh.__version__,
+        "env_version": 2,
     }
 
 
+def _get_project(project_root: str) -> pharaoh.project.PharaohProject:
+    # Reuse the project instance that started the build, so its already discovered assets are used
+    with contextlib.suppress(RuntimeError):
+        proj = pharaoh.project.get_project()
+        if proj.project_root == Path(project_root).absolute().resolve():
+            return proj
+    return pharaoh.project.PharaohProject(project_root)
+
+
 def get_app() -> PharaohSphinx:
     return setup.app  # type: ignore[attr-defined]
 
@@ -198,41 +217,45 @@ class PharaohAssetDirective(Directive):
         option_components = options.get("components", "_this_").lower().strip()
 
         # Find the component name of the currently handled RST file
-        try:
-            current_component = Path(template_file).relative_to(pharaoh_proj.sphinx_report_project_components).parts[0]
-        except Exception:
-            current_component = None
-
-        component_selection = set()
-        if option_components != "_all_":
-            for comp in map(str.strip, option_components.split(",")):
-                if comp != "_this_":
-                    component_selection.add(comp)
-                elif current_component is not None:
-                    component_selection.add(current_component)
+        current_component = _component_of(pharaoh_proj, template_file)
+        component_selection = select_components(option_components, current_component)
 
         # Discover assets by filter
         assets = []
+        filter_errors: list[str] = []
         filter_string = (
             split_filter(" ".join(content))
             + split_filter(options.get("filter", ""))
             + split_filter(" ".join(arguments))
         )
         filter_string = list(set(filter_string))
-        if len(filter_string) == 1 and filter_string[0].strip().startswith("__ID__"):
-            asset = asset_finder.get_asset_by_id(filter_string[0].strip())
-            if asset is not None:
-                assets.append(asset)
-        else:
-            for line in filter_string:
-                line = line.strip()
-                if line:
-                    assets.extend(asset_finder.search_assets(line, list(component_selection)))
+        with asset_finder.record_lookups() as lookups:
+            if len(filter_string) == 1 and filter_string[0].strip().startswith("__ID__"):
+                asset = asset_finder.get_asset_by_id(filter_string[0].strip())
+                if asset is not None:
+                    assets.append(asset)
+            else:
+                lines = [line.strip() for line in filter_string if line.strip()]
+                for found in asset_finder.search_many(lines, component_selection):
+                    assets.extend(found)
+                for line in lines:
+                    errors = asset_finder.query_errors(line, component_selection)
+                    # Conditions that fail for every asset are most likely wrong, e.g. a misspelled metadata key
+                    if errors is not None and errors.count == errors.total:
+                        filter_errors.append(
+                            f"Asset filter {line!r} failed for all {errors.total} assets: {errors.message}"
+                        )
+        # Re-read the document if the found assets change
+        deps = dependencies.get_dependencies(self.state.document.settings.env)
+        if deps is not None:
+            deps.add_lookups(lookups)
         # Filter potential duplicates added by multiple "overlapping" asset filters
         assets = asset_finder.sort_assets(list(set(assets)))
         if not len(assets) and not asset_optional:
-            msg = "No assets matched!\n"
+            msg = "\n".join(["No assets matched!", *filter_errors]) + "\n"
             raise Exception(msg)
+        for msg in filter_errors:
+            note_asset_warning(self.state.document.settings.env, msg, self.lineno)
 
         # Parse index. Following style is possible: 1,2,4-8,9. Whitespace is ignored.
         index = str(options.pop("index", "")).replace(" ", "")
@@ -245,6 +268,10 @@ class PharaohAssetDirective(Directive):
                 else:
                     indices.append(int(part))
 
+        template_defaults = asset_template_defaults(pharaoh_proj)
+        # Pre-rendered asset fragments (setting asset_gen.render_fragments) can be used, if no template options are set
+        use_fragments = not set(options) - {"filter", "components"}
+
         lines_to_insert = []
         for iasset, asset in enumerate(assets):
             if indices and iasset not in indices:
@@ -261,11 +288,8 @@ class PharaohAssetDirective(Directive):
             for k, v in asset_options.items():
                 template_opts.setdefault(k, v)
             #  3. Project defaults
-            template_opts.setdefault("iframe_width", pharaoh_proj.get_setting("asset_gen.default_iframe_width"))
-            template_opts.setdefault("iframe_height", pharaoh_proj.get_setting("asset_gen.default_iframe_height"))
-            template_opts.setdefault(
-                "datatable_extended_search", pharaoh_proj.get_setting("asset_gen.default_datatable_extended_search")
-            )
+            for k, v in template_defaults.items():
+                template_opts.setdefault(k, v)
 
             if "template" not in template_opts:
                 msg = f"No template selected for asset {asset}!"
@@ -283,28 +307,32 @@ class PharaohAssetDirective(Directive):
                     f"An error occurred during asset generation: {asset.context.get('error_message', '')}. "
                     f"Please search the log for the error message including traceback!"
                 )
-                if msg not in sphinx_app.seen_warnings:
-                    sphinx_app.seen_warnings.add(msg)
-                    self.state_machine.reporter.warning(msg)
+                note_asset_warning(self.state.document.settings.env, msg, self.lineno)
 
-            assert sphinx_app.pharaoh_te is not None
-            content = render_asset_template(
-                jinja_env=sphinx_app.pharaoh_te,
-                template=template,
-                opts=template_opts,
-                image_opts=image_opts,
-                asset=asset,
-                asset_rel_path_from_project=partial(asset_rel_path_from_project, pharaoh_proj),
-                asset_rel_path_from_build=partial(asset_rel_path_from_build, sphinx_app, Path(template_file)),
-            )
+            fragment = load_asset_fragment(pharaoh_proj, asset) if use_fragments else None
+            if fragment is not None:
+                result = fill_asset_fragment(
+                    fragment, partial(asset_rel_path_from_build, sphinx_app, Path(template_file), asset)
+                )
+            else:
+                assert sphinx_app.pharaoh_te is not None
+                content = render_asset_template(
+                    jinja_env=sphinx_app.pharaoh_te,
+                    template=template,
+                    opts=template_opts,
+                    image_opts=image_opts,
+                    asset=asset,
+                    asset_rel_path_from_project=partial(asset_rel_path_from_project, pharaoh_proj),
+                    asset_rel_path_from_build=partial(asset_rel_path_from_build, sphinx_app, Path(template_file)),
+                )
 
-            result = render_asset_template(
-                jinja_env=sphinx_app.pharaoh_te,
-                template="include_wrapper",
-                asset=asset,
-                content=content,
-                opts=template_opts,
-            )
+                result = render_asset_template(
+                    jinja_env=sphinx_app.pharaoh_te,
+                    template="include_wrapper",
+                    asset=asset,
+                    content=content,
+                    opts=template_opts,
+                )
 
             lines_to_insert.extend(result.split("\n"))
         if lines_to_insert:
@@ -324,6 +352,176 @@ class PharaohAssetDirective(Directive):
         return []
 
 
+def _component_of(pharaoh_proj: pharaoh.project.PharaohProject, file: str | Path) -> str | None:
+    try:
+        return Path(file).relative_to(pharaoh_proj.sphinx_report_project_components).parts[0]
+    except Exception:
+        return None
+
+
+def select_components(option_components: str, current_component: str | None) -> list[str]:
+    """
+    Returns the sorted component names selected by the ``:components:`` option of the directive.
+
+    The special value ``_this_`` refers to the component of the document, ``_all_`` to all components
+    (returns an empty list).
+    """
+    component_selection = set()
+    option_components = option_components.lower().strip()
+    if option_components != "_all_":
+        for comp in map(str.strip, option_components.split(",")):
+            if comp != "_this_":
+                component_selection.add(comp)
+            elif current_component is not None:
+                component_selection.add(current_component)
+    return sorted(component_selection)
+
+
+_DIRECTIVE_RE = re.compile(r"^(?P<indent>[ \t]*)\.\.[ \t]+pharaoh?-asset::(?P<argument>.*)$")
+_OPTION_RE = re.compile(r"^:(?P<name>[\w-]+):(?P<value>.*)$")
+
+
+def collect_directive_filters(text: str) -> list[tuple[list[str], str]]:
+    """
+    Collects the filters of all ``pharaoh-asset`` directives inside an (unrendered) source file.
+
+    Filters that contain Jinja markup are skipped, since they are only known after build-time templating.
+
+    :param text: The content of the source file
+    :return: A list of (filters, components option) tuples, one for each directive
+    """
+    lines = text.splitlines()
+    collected = []
+    i = 0
+    while i < len(lines):
+        match = _DIRECTIVE_RE.match(lines[i])
+        i += 1
+        if match is None:
+            continue
+        indent = len(match.group("indent"))
+        body = []
+        while i < len(lines) and (not lines[i].strip() or len(lines[i]) - len(lines[i].lstrip()) > indent):
+            body.append(lines[i])
+            i += 1
+        body = textwrap.dedent("\n".join(body)).splitlines()
+
+        j = 0
+        arguments = [match.group("argument")]
+        while j < len(body) and body[j].strip() and not _OPTION_RE.match(body[j]):
+            arguments.append(body[j])
+            j += 1
+        options = {}
+        while j < len(body) and _OPTION_RE.match(body[j]):
+            option = _OPTION_RE.match(body[j])
+            value = [option.group("value")]
+            j += 1
+            while j < len(body) and body[j].strip() and body[j][0].isspace():
+                value.append(body[j])
+                j += 1
+            options[option.group("name")] = " ".join(map(str.strip, value))
+
+        filters = (
+            split_filter(" ".join(body[j:]))
+            + split_filter(options.get("filter", ""))
+            + split_filter(" ".join(arguments))
+        )
+        filters = [f for f in filters if f and not f.startswith("__ID__") and not re.search(r"{[{%#]", f)]
+        if filters:
+            collected.append((filters, options.get("components", "_this_")))
+    return collected
+
+
+def note_asset_warning(env, msg: str, lineno: int | None):
+    """
+    Records a warning of the document that is currently read. Warnings are stored in the environment instead of being
+    issued immediately, so they can be de-duplicated across parallel read processes by :func:`emit_asset_warnings`.
+    """
+    if not hasattr(env, "pharaoh_asset_warnings"):
+        env.pharaoh_asset_warnings = {}
+    env.pharaoh_asset_warnings.setdefault(env.docname, {}).setdefault(msg, lineno)
+
+
+def remember_read_docs(app: PharaohSphinx, env, docnames: list[str]):
+    """
+    Called by Sphinx core event "env-before-read-docs".
+    """
+    app.pharaoh_read_docs = set(docnames)
+
+
+def purge_asset_warnings(app: PharaohSphinx, env, docname: str):
+    """
+    Called by Sphinx core event "env-purge-doc".
+    """
+    if hasattr(env, "pharaoh_asset_warnings"):
+        env.pharaoh_asset_warnings.pop(docname, None)
+
+
+def merge_asset_warnings(app: PharaohSphinx, env, docnames: set[str], other):
+    """
+    Called by Sphinx core event "env-merge-info" to collect the warnings recorded in parallel read processes.
+    """
+    other_warnings = getattr(other, "pharaoh_asset_warnings", {})
+    if not hasattr(env, "pharaoh_asset_warnings"):
+        env.pharaoh_asset_warnings = {}
+    for docname in docnames:
+        if docname in other_warnings:
+            env.pharaoh_asset_warnings[docname] = other_warnings[docname]
+
+
+def emit_asset_warnings(app: PharaohSphinx, env) -> list[str]:
+    """
+    Called by Sphinx core event "env-updated" in the main process after all documents are read.
+
+    Issues each warning recorded by the documents read in this build only once.
+    """
+    seen = set()
+    all_warnings = getattr(env, "pharaoh_asset_warnings", {})
+    for docname in sorted(getattr(app, "pharaoh_read_docs", ())):
+        for msg, lineno in all_warnings.get(docname, {}).items():
+            if msg not in seen:
+                seen.add(msg)
+                logger.warning(msg, location=(docname, lineno))
+    app.pharaoh_read_docs = set()
+    return []
+
+
+def prefetch_directive_filters(app: PharaohSphinx, env, docnames: list[str]):
+    """
+    Called by Sphinx core event "env-before-read-docs".
+
+    Resolves the filters of all ``pharaoh-asset`` directives inside the documents to read using
+    :func:`AssetFinder.search_many <pharaoh.assetlib.finder.AssetFinder.search_many>`, so the results are cached
+    before the directives are executed (also in parallel read processes).
+    """
+    from pharaoh.assetlib.query import compile_query
+
+    pharaoh_proj = app.pharaoh_proj
+    if pharaoh_proj is None:
+        return
+    by_components: dict[tuple[str, ...], set[str]] = {}
+    for docname in docnames:
+        source = Path(env.doc2path(docname))
+        try:
+            text = source.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue
+        current_component = _component_of(pharaoh_proj, source)
+        for filters, option_components in collect_directive_filters(text):
+            components = tuple(select_components(option_components, current_component))
+            by_components.setdefault(components, set()).update(filters)
+
+    for components, filters in by_components.items():
+        conditions = []
+        for condition in sorted(filters):
+            with contextlib.suppress(SyntaxError, ValueError):
+                compile_query(condition)
+                conditions.append(condition)
+        try:
+            pharaoh_proj.asset_finder.search_many(conditions, components)
+        except Exception as e:
+            logger.verbose(f"Could not prefetch asset filters: {e}")
+
+
 def split_filter(string: str) -> list[str]:
     # First split by all ; that are not escaped with \
     split_by_semicolon = [substring.strip() for substring in re.split(r"(?<!\\);", string)]
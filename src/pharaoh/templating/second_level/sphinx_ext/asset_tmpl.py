@@ -1,11 +1,35 @@
 from __future__ import annotations
 
+import json
+import re
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
+
+from pharaoh.log import log
+from pharaoh.templating.second_level.env_globals import rand_id
 
 if TYPE_CHECKING:
+    import jinja2
+
+    from pharaoh.assetlib.finder import Asset
+    from pharaoh.project import PharaohProject
     from pharaoh.templating.second_level.template_env import PharaohTemplateEnv
 
+BUILD_PATH_PLACEHOLDER = "@@pharaoh_build_path@@"
+_RAND_ID_PLACEHOLDER = "@@pharaoh_rand_id_{}_{}@@"
+_RAND_ID_PATTERN = re.compile(r"@@pharaoh_rand_id_\d+_(\d*)@@")
+
+
+@lru_cache(maxsize=1)
+def _get_fragment_env() -> PharaohTemplateEnv:
+    """
+    Returns the template environment used to render asset fragments during asset generation.
+    """
+    from pharaoh.templating.second_level.template_env import PharaohTemplateEnv
+
+    return PharaohTemplateEnv()
+
 
 def find_asset_template(template_name: str) -> Path:
     from pharaoh.plugins.plugin_manager import PM
@@ -21,9 +45,145 @@ def find_asset_template(template_name: str) -> Path:
     return files[0]
 
 
-def render_asset_template(jinja_env: PharaohTemplateEnv, template: str, **kwargs) -> str:
-    template_file = Path(template).absolute() if Path(template).absolute().exists() else find_asset_template(template)
-    template_content = "\n" + template_file.read_text(encoding="utf-8").strip() + "\n"
+def _resolve_asset_template(jinja_env: PharaohTemplateEnv, template: str) -> tuple[Path, int]:
+    # Returns the file and modification time of an asset render template name or template file path
+    template_file = Path(template).absolute()
+    try:
+        return template_file, template_file.stat().st_mtime_ns
+    except OSError:
+        if template not in jinja_env.asset_template_files:
+            jinja_env.asset_template_files[template] = find_asset_template(template)
+        template_file = jinja_env.asset_template_files[template]
+        return template_file, template_file.stat().st_mtime_ns
 
+
+def get_asset_template(jinja_env: PharaohTemplateEnv, template: str) -> jinja2.Template:
+    """
+    Returns the compiled asset render template for a template name or a template file path.
+
+    Template names are resolved via plugins only once per template environment and compiled templates are cached
+    per file, until the file is modified.
+    """
+    template_file, mtime = _resolve_asset_template(jinja_env, template)
+    cached = jinja_env.asset_templates.get(template_file)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    template_content = "\n" + template_file.read_text(encoding="utf-8").strip() + "\n"
     tmpl = jinja_env.from_string(template_content)
-    return tmpl.render(**kwargs)
+    jinja_env.asset_templates[template_file] = (mtime, tmpl)
+    return tmpl
+
+
+def render_asset_template(jinja_env: PharaohTemplateEnv, template: str, **kwargs) -> str:
+    return get_asset_template(jinja_env, template).render(**kwargs)
+
+
+def asset_template_defaults(project: PharaohProject) -> dict:
+    """
+    Returns the project's default options for asset render templates.
+    """
+    return {
+        "iframe_width": project.get_setting("asset_gen.default_iframe_width"),
+        "iframe_height": project.get_setting("asset_gen.default_iframe_height"),
+        "datatable_extended_search": project.get_setting("asset_gen.default_datatable_extended_search"),
+    }
+
+
+def render_asset_fragment(project: PharaohProject, asset: Asset) -> Path | None:
+    """
+    Renders the RST of an asset like a ``pharaoh-asset`` directive without template options does and stores it in
+    :attr:`Asset.fragmentfile <pharaoh.assetlib.finder.Asset.fragmentfile>`.
+
+    Since paths relative to the build directory and random IDs depend on the including document, placeholders are
+    rendered instead, see :func:`fill_asset_fragment`.
+
+    :return: The fragment file, or None if the asset has no template or could not be rendered
+        (e.g. because the template uses Jinja globals defined in conf.py).
+    """
+    from pharaoh.templating.second_level.util import asset_rel_path_from_project
+
+    template_opts = dict(asset.context.get("asset", {}).items())
+    if not template_opts.get("template"):
+        return None
+    defaults = asset_template_defaults(project)
+    for key, value in defaults.items():
+        template_opts.setdefault(key, value)
+    template = str(template_opts["template"]).strip().lower()
+
+    fragment_env = _get_fragment_env()
+    ids: list[str] = []
+
+    def rand_id_placeholder(chars: int | None = None) -> str:
+        ids.append(_RAND_ID_PLACEHOLDER.format(len(ids), "" if chars is None else chars))
+        return ids[-1]
+
+    try:
+        content = render_asset_template(
+            jinja_env=fragment_env,
+            template=template,
+            opts=template_opts,
+            image_opts={},
+            asset=asset,
+            asset_rel_path_from_project=partial(asset_rel_path_from_project, project),
+            asset_rel_path_from_build=lambda asset: BUILD_PATH_PLACEHOLDER,
+            rand_id=rand_id_placeholder,
+        )
+        rst = render_asset_template(
+            jinja_env=fragment_env,
+            template="include_wrapper",
+            asset=asset,
+            content=content,
+            opts=template_opts,
+            rand_id=rand_id_placeholder,
+        )
+        templates = {}
+        for name in (template, "include_wrapper"):
+            file, mtime = _resolve_asset_template(fragment_env, name)
+            templates[str(file)] = mtime
+    except Exception as e:
+        log.debug(f"Could not render RST fragment of {asset}: {e!r}")
+        return None
+
+    fragment = {"defaults": defaults, "templates": templates, "rst": rst}
+    asset.fragmentfile.write_text(json.dumps(fragment, default=str), encoding="utf-8")
+    return asset.fragmentfile
+
+
+def load_asset_fragment(project: PharaohProject, asset: Asset) -> str | None:
+    """
+    Returns the pre-rendered RST fragment of an asset, or None if there is none or it is outdated because the
+    project's template defaults or the render templates changed.
+    """
+    try:
+        fragment = json.loads(asset.fragmentfile.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if fragment["defaults"] != json.loads(json.dumps(asset_template_defaults(project), default=str)):
+        return None
+    for file, mtime in fragment["templates"].items():
+        try:
+            if Path(file).stat().st_mtime_ns != mtime:
+                return None
+        except OSError:
+            return None
+    return fragment["rst"]
+
+
+def fill_asset_fragment(rst: str, build_path: Callable[[], str]) -> str:
+    """
+    Replaces the placeholders of an RST fragment rendered by :func:`render_asset_fragment`.
+
+    :param rst: The RST fragment
+    :param build_path: Returns the path of the asset relative to the including document in the build directory
+    """
+    if BUILD_PATH_PLACEHOLDER in rst:
+        rst = rst.replace(BUILD_PATH_PLACEHOLDER, build_path())
+    ids: dict[str, str] = {}
+
+    def replace_id(match: re.Match) -> str:
+        if match.group(0) not in ids:
+            ids[match.group(0)] = rand_id(int(match.group(1)) if match.group(1) else None)
+        return ids[match.group(0)]
+
+    return _RAND_ID_PATTERN.sub(replace_id, rst)
@@ -0,0 +1,176 @@
+"""
+Tracks which assets and context files each document depends on, so incremental Sphinx builds only re-read
+documents whose assets or templates changed.
+
+Template files and context files are registered as regular Sphinx dependencies (``env.note_dependency``),
+asset searches and lookups are stored per document in ``env.pharaoh_dependencies`` and re-checked
+on event "env-get-outdated".
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import omegaconf
+from sphinx.util import logging
+
+if TYPE_CHECKING:
+    from sphinx.environment import BuildEnvironment
+
+    from pharaoh.assetlib.finder import AssetFinder, AssetLookups
+    from pharaoh.project import PharaohProject
+    from pharaoh.sphinx_app import PharaohSphinx
+
+logger = logging.getLogger("pharaoh_dependencies")
+
+
+@dataclass
+class DocumentDependencies:
+    """
+    The assets and context file listings a document depends on.
+
+    :ivar queries: Maps asset searches (condition, components) to the IDs of the found assets
+    :ivar assets: Maps the IDs of used assets to the modification time of their ``*.assetinfo`` file
+        (None if the asset was looked up but did not exist)
+    :ivar listings: Maps directories to the names of the context files that were found inside
+    """
+
+    queries: dict[tuple[str, tuple[str, ...] | None], frozenset[str]] = field(default_factory=dict)
+    assets: dict[str, int | None] = field(default_factory=dict)
+    listings: dict[str, frozenset[str]] = field(default_factory=dict)
+
+    def add_lookups(self, lookups: AssetLookups):
+        self.queries.update(lookups.queries)
+        for asset_id, asset in lookups.assets.items():
+            self.assets[asset_id] = _asset_stamp(asset)
+
+    def update(self, other: DocumentDependencies):
+        self.queries.update(other.queries)
+        self.assets.update(other.assets)
+        self.listings.update(other.listings)
+
+    def is_outdated(self, finder: AssetFinder, stamps: dict[str, int | None]) -> bool:
+        """
+        Checks if the recorded searches would return other assets now or if any used asset changed.
+
+        :param finder: The asset finder to check against
+        :param stamps: A cache of asset stamps, shared between documents
+        """
+        for (condition, components), ids in self.queries.items():
+            found = finder.search_assets(condition, components) if condition else list(finder.iter_assets(components))
+            if frozenset(asset.id for asset in found) != ids:
+                return True
+        for asset_id, stamp in self.assets.items():
+            if asset_id not in stamps:
+                stamps[asset_id] = _asset_stamp(finder.get_asset_by_id(asset_id))
+            if stamps[asset_id] != stamp:
+                return True
+        return any(list_context_files(directory) != names for directory, names in self.listings.items())
+
+
+def _asset_stamp(asset) -> int | None:
+    if asset is None:
+        return None
+    try:
+        return asset.infofile.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def list_context_files(directory: str) -> frozenset[str]:
+    """
+    Returns the names of the local context files inside a directory.
+    """
+    path = Path(directory)
+    return frozenset(f.name for pattern in ("*_context.yaml", "*_context.py") for f in path.glob(pattern))
+
+
+def get_dependencies(env: BuildEnvironment) -> DocumentDependencies | None:
+    """
+    Returns the dependencies of the document that is currently read, or None if no document is read.
+    """
+    docname = env.temp_data.get("docname")
+    if docname is None:
+        return None
+    if not hasattr(env, "pharaoh_dependencies"):
+        env.pharaoh_dependencies = {}
+    return env.pharaoh_dependencies.setdefault(docname, DocumentDependencies())
+
+
+def note_file(env: BuildEnvironment, filename: str):
+    """
+    Registers a file as dependency of the document that is currently read.
+    """
+    if env.temp_data.get("docname") is not None:
+        env.note_dependency(filename)
+
+
+def note_context_listing(env: BuildEnvironment, directory: str):
+    """
+    Registers the context files inside a directory as dependency of the document that is currently read,
+    so the document is also re-read if context files are added or removed.
+    """
+    deps = get_dependencies(env)
+    if deps is not None:
+        deps.listings[directory] = list_context_files(directory)
+
+
+def purge_doc(app: PharaohSphinx, env: BuildEnvironment, docname: str):
+    """
+    Called by Sphinx core event "env-purge-doc".
+    """
+    if hasattr(env, "pharaoh_dependencies"):
+        env.pharaoh_dependencies.pop(docname, None)
+
+
+def merge_info(app: PharaohSphinx, env: BuildEnvironment, docnames: set[str], other: BuildEnvironment):
+    """
+    Called by Sphinx core event "env-merge-info" to collect the dependencies recorded in parallel read processes.
+    """
+    other_deps = getattr(other, "pharaoh_dependencies", {})
+    if not hasattr(env, "pharaoh_dependencies"):
+        env.pharaoh_dependencies = {}
+    for docname in docnames:
+        if docname in other_deps:
+            env.pharaoh_dependencies[docname] = other_deps[docname]
+
+
+def get_settings_hash(proj: PharaohProject) -> str:
+    """
+    Returns a hash of the unresolved project settings.
+    """
+    settings = omegaconf.OmegaConf.to_container(proj.get_settings(), resolve=False)
+    return hashlib.md5(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_outdated(
+    app: PharaohSphinx, env: BuildEnvironment, added: set[str], changed: set[str], removed: set[str]
+) -> list[str]:
+    """
+    Called by Sphinx core event "env-get-outdated".
+
+    Returns all documents, whose recorded asset searches or assets changed.
+    All documents are returned if the project settings changed.
+    """
+    proj = app.pharaoh_proj
+    settings_hash = get_settings_hash(proj)
+    previous_hash = getattr(env, "pharaoh_settings_hash", None)
+    env.pharaoh_settings_hash = settings_hash
+    if previous_hash is not None and previous_hash != settings_hash:
+        logger.info("[pharaoh] Project settings changed, re-reading all documents")
+        return sorted(env.found_docs)
+
+    all_deps: dict[str, DocumentDependencies] = getattr(env, "pharaoh_dependencies", {})
+    stamps: dict[str, int | None] = {}
+    outdated = []
+    for docname in sorted(env.found_docs - added - changed):
+        deps = all_deps.get(docname)
+        if deps is not None and deps.is_outdated(proj.asset_finder, stamps):
+            outdated.append(docname)
+    if outdated:
+        logger.info(f"[pharaoh] {len(outdated)} document(s) outdated because of changed assets")
+    return outdated
@@ -21,6 +21,7 @@ def setup(app: PharaohSphinx):
     app.connect("builder-inited", app.pharaoh_te.sphinx_builder_inited_hook)
     app.connect("source-read", app.pharaoh_te.sphinx_source_read_hook)
     app.connect("include-read", app.pharaoh_te.sphinx_include_read_hook)
+    app.connect("env-updated", app.pharaoh_te.sphinx_env_updated_hook)
 
     return {
         "parallel_read_safe": True,
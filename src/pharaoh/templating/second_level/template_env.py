@@ -1,26 +1,33 @@
 from __future__ import annotations
 
+import collections.abc
 import functools
+import hashlib
+import json
 import os
 import pprint
-import shutil
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import partial
 from pathlib import Path
-from types import ModuleType
-from typing import TYPE_CHECKING, Callable
+from types import MappingProxyType, ModuleType
+from typing import TYPE_CHECKING, Any, Callable
 
 import jinja2
 import jinja2.utils
 import omegaconf
 from jinja2_git import GitExtension
 
+import pharaoh
+from pharaoh.assetlib.finder import COPY_STRATEGIES, copy_assets, sync_assets
 from pharaoh.log import log
 from pharaoh.util.contextlib_chdir import chdir
 
 from .env_filters import env_filters
 from .env_globals import env_globals
 from .env_tests import env_tests
+from .render_cache import RenderCache, RenderRecord
+from .sphinx_ext import dependencies
 from .util import asset_rel_path_from_build, asset_rel_path_from_project
 
 if TYPE_CHECKING:
@@ -28,7 +35,8 @@ if TYPE_CHECKING:
 
     from sphinx.config import Config
 
-    import pharaoh.project
+    from pharaoh.assetlib.finder import Asset
+    from pharaoh.project import PharaohProject
     from pharaoh.sphinx_app import PharaohSphinx
 
 
@@ -50,17 +58,213 @@ class PharaohFileSystemLoader(jinja2.loaders.FileSystemLoader):
 
             # Original code starts from here
 
-            if not os.path.isfile(filename):
-                continue
-            with open(filename, "rb") as f:
-                contents = f.read().decode(self.encoding)
+            if os.path.isfile(filename):
+                break
+        else:
+            raise jinja2.TemplateNotFound(template)
+
+        with open(filename, "rb") as f:
+            contents = f.read().decode(self.encoding)
 
-            def up_to_date() -> bool:
+        mtime = os.path.getmtime(filename)
+
+        def up_to_date() -> bool:
+            # Templates stay cached in the environment until the file is modified
+            try:
+                return os.path.getmtime(filename) == mtime
+            except OSError:
                 return False
 
-            # Use normpath to convert Windows altsep to sep.
-            return contents, os.path.normpath(filename), up_to_date
-        raise jinja2.TemplateNotFound(template)
+        # Use normpath to convert Windows altsep to sep.
+        return contents, os.path.normpath(filename), up_to_date
+
+
+# Stored in LocalContext for values that are not loaded yet
+_NOT_LOADED = object()
+
+
+class LocalContext(dict):
+    """
+    The mapping behind ``ctx.local``.
+
+    Values added via :meth:`set_lazy` are only loaded on first access, so large asset contexts don't slow down
+    templates that do not use them.
+    Since it's a dict, it can be passed to everything expecting one (e.g. filter ``tojson``).
+    All methods returning values, like ``items()`` or ``values()``, load them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaders: dict[str, Callable[[], Any]] = {}
+
+    def set_lazy(self, key: str, loader: Callable[[], Any]):
+        self._loaders[key] = loader
+        super().__setitem__(key, _NOT_LOADED)
+
+    def __getitem__(self, key: str) -> Any:
+        value = super().__getitem__(key)
+        if value is _NOT_LOADED:
+            value = self._loaders.pop(key)()
+            super().__setitem__(key, value)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self._loaders.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str):
+        self._loaders.pop(key, None)
+        super().__delitem__(key)
+
+    def __iter__(self):
+        # Overwritten, so dict(), ** and update() read the values via __getitem__ instead of copying them directly
+        return super().__iter__()
+
+    def __eq__(self, other: object) -> bool:
+        return dict(self.items()) == other
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __or__(self, other):
+        merged = dict(self.items())
+        merged.update(other)
+        return merged
+
+    def __ror__(self, other):
+        merged = dict(other)
+        merged.update(self.items())
+        return merged
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            return default
+        return self[key]
+
+    def items(self):
+        return collections.abc.ItemsView(self)
+
+    def values(self):
+        return collections.abc.ValuesView(self)
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key not in self:
+            return super().pop(key, *default)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self) -> tuple[str, Any]:
+        key = next(reversed(self.keys()))
+        return key, self.pop(key)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def copy(self) -> LocalContext:
+        new = LocalContext()
+        dict.update(new, super().items())
+        new._loaders.update(self._loaders)
+        return new
+
+    def __repr__(self) -> str:
+        loaded = {key: value for key, value in super().items() if value is not _NOT_LOADED}
+        not_loaded = [key for key, value in super().items() if value is _NOT_LOADED]
+        return f"{self.__class__.__name__}({loaded!r}, not loaded: {not_loaded!r})"
+
+
+class RenderedFileWriter:
+    """
+    Writes the ``*.rendered`` files of build-time templating in a background thread, so Sphinx' read phase does not
+    wait for file I/O. Files are only written if their content changed.
+    """
+
+    def __init__(self):
+        self._pid = os.getpid()
+        self._executor: ThreadPoolExecutor | None = None
+        self._futures: list[Future] = []
+
+    def write(self, file: Path, content: str):
+        if os.getpid() != self._pid:
+            # Background threads don't survive the fork into parallel Sphinx read processes, so write synchronously
+            write_if_changed(file, content)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pharaoh_rendered_writer")
+        self._futures.append(self._executor.submit(write_if_changed, file, content))
+
+    def flush(self):
+        """
+        Waits until all scheduled files are written.
+        """
+        futures, self._futures = self._futures, []
+        for future in futures:
+            try:
+                future.result()
+            except OSError as e:
+                log.warning(f"Could not write rendered file: {e}")
+
+    def shutdown(self):
+        """
+        Waits until all scheduled files are written and stops the background thread, e.g. before forking processes.
+        The thread is started again by the next :func:`write`.
+        """
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class AssetCopier:
+    """
+    Collects the assets referenced during the read phase of a Sphinx build and copies them to the build directory
+    in one batch using a thread pool (see :func:`pharaoh.assetlib.finder.copy_assets`), so directives and templates
+    don't wait for file I/O. The thread pool only exists during :func:`flush`.
+    """
+
+    def __init__(self, strategy: str = "auto"):
+        """
+        :param strategy: How asset files are copied, see :data:`pharaoh.assetlib.finder.COPY_STRATEGIES`
+        """
+        self.strategy = strategy
+        self._pid = os.getpid()
+        self._pending: dict[Path, dict[str, Asset]] = {}
+
+    def copy(self, asset: Asset, target_dir: Path):
+        if os.getpid() != self._pid:
+            # Parallel Sphinx read processes don't share the pending assets with the main process, so copy now
+            asset.copy_to(target_dir, self.strategy)
+            return
+        self._pending.setdefault(target_dir, {})[asset.id] = asset
+
+    def flush(self):
+        """
+        Copies all pending assets.
+        """
+        pending, self._pending = self._pending, {}
+        for target_dir, assets in pending.items():
+            copied = copy_assets(assets.values(), target_dir, self.strategy)
+            log.debug(f"Copied {copied} of {len(assets)} referenced assets to {target_dir}")
+
+
+def write_if_changed(file: Path, content: str) -> bool:
+    """
+    Writes the content to the file, unless the file already has exactly this content.
+
+    :return: True if the file was written
+    """
+    data = content.encode("utf-8")
+    try:
+        if file.stat().st_size == len(data) and file.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    file.write_bytes(data)
+    return True
 
 
 class PharaohTemplate(jinja2.Template):
@@ -80,12 +284,25 @@ class PharaohTemplateEnv(jinja2.Environment):
         )
         self.default_context: dict = {
             "project": {},  # Project related context
-            "local": {},  # Discovered content of context files next to the source file
+            "local": {},  # Discovered content of context files next to the source file, see create_render_context
             "assets": {},  # Discovered content of asset files registered via register_templating_context function
             "config": None,  # Content of conf.py (Sphinx Config object)
             "user": None,  # Content of user given dict "pharaoh_jinja_context" in conf.py
         }
-        self.local_context_file_cache: dict[Path, ModuleType] = {}
+        # Maps context files to their modification time and loaded content, see load_local_context_file
+        self.local_context_file_cache: dict[Path, tuple[int, Any]] = {}
+        # Maps asset files to their modification time and parsed content, see load_asset_context
+        self.asset_context_cache: dict[Path, tuple[int, Any]] = {}
+        # Resolved and compiled templates of the pharaoh-asset directive, see asset_tmpl.get_asset_template
+        self.asset_template_files: dict[str, Path] = {}
+        self.asset_templates: dict[Path, tuple[int, jinja2.Template]] = {}
+
+        self.rendered_file_writer = RenderedFileWriter()
+        self.asset_copier = AssetCopier()
+        # Set if setting report.render_cache is enabled
+        self.render_cache: RenderCache | None = None
+        # The dependencies of the renderings in progress
+        self._render_records: list[RenderRecord] = []
 
         self.sphinx_app: PharaohSphinx | None = None
         self.globals.update(env_globals)
@@ -135,7 +352,8 @@ class PharaohTemplateEnv(jinja2.Environment):
                 raise NameError(msg)
             self.tests[k] = v
 
-        template_paths = PM.pharaoh_collect_l2_templates()
+        # Copy, since the plugin result is cached and must not be extended
+        template_paths = list(PM.pharaoh_collect_l2_templates())
         # dynamically discovered
         for path in config.pharaoh_jinja_templates or []:
             # Extend user-configured template paths
@@ -154,6 +372,30 @@ class PharaohTemplateEnv(jinja2.Environment):
                 template_paths.append(path.resolve())
 
         self.loader = PharaohFileSystemLoader(template_paths)
+        if pharaoh_proj.get_setting("report.jinja_bytecode_cache", True):
+            # Compiled templates are persisted between builds. Entries are validated by a checksum of the template
+            # source, so modified templates are compiled again.
+            pharaoh_proj.jinja_cache_dir.mkdir(parents=True, exist_ok=True)
+            self.bytecode_cache = jinja2.FileSystemBytecodeCache(str(pharaoh_proj.jinja_cache_dir))
+        if pharaoh_proj.get_setting("report.render_cache", False):
+            fingerprint = hashlib.md5(
+                json.dumps(
+                    [
+                        pharaoh.__version__,
+                        dependencies.get_settings_hash(pharaoh_proj),
+                        (Path(app.confdir) / "conf.py").read_text(encoding="utf-8"),
+                        [str(path) for path in template_paths],
+                    ]
+                ).encode()
+            ).hexdigest()
+            self.render_cache = RenderCache(pharaoh_proj.render_cache_dir, fingerprint)
+        self.asset_copier.strategy = pharaoh_proj.get_setting("report.asset_copy_strategy", "auto")
+        if self.asset_copier.strategy not in COPY_STRATEGIES:
+            msg = (
+                f"Invalid setting report.asset_copy_strategy: {self.asset_copier.strategy!r}. "
+                f"Valid strategies: {', '.join(COPY_STRATEGIES)}"
+            )
+            raise ValueError(msg)
 
         self.default_context["project"]["instance"] = pharaoh_proj
         self.default_context["config"] = app.config or {}
@@ -164,17 +406,31 @@ class PharaohTemplateEnv(jinja2.Environment):
         Called by Sphinx core event "builder-inited". Emitted when the builder object has been created.
         https://www.sphinx-doc.org/en/master/extdev/appapi.html#event-builder-inited
         """
-        finder = app.pharaoh_proj.asset_finder
+        self.copy_shared_assets(app)
 
-        # Copy shared resources
-        assets_to_copy = finder.search_assets("asset.copy2build")
-        build_assetdir = app.assets_dir
-        if build_assetdir.exists():
-            shutil.rmtree(build_assetdir, ignore_errors=False)
+    def copy_shared_assets(self, app: PharaohSphinx):
+        """
+        Synchronizes all assets with metadata ``asset.copy2build`` to the build directory.
+
+        Only new or changed assets are copied. Copies of assets that no longer exist are removed,
+        copies of other existing assets are kept, since documents of a reused environment may still reference them.
+        """
+        finder = app.pharaoh_proj.asset_finder
+        shared_assets = finder.search_assets("asset.copy2build")
+        copied, removed = sync_assets(
+            shared_assets, app.assets_dir, keep=finder.iter_assets(), strategy=self.asset_copier.strategy
+        )
+        if copied or removed:
+            log.info(f"Synchronized assets to build directory ({copied} copied, {removed} removed)")
 
-        for asset in assets_to_copy:
-            log.debug(f"Copying asset {asset} to build directory")
-            asset.copy_to(build_assetdir)
+    def sphinx_env_updated_hook(self, app: PharaohSphinx, env) -> list[str]:
+        """
+        Called by Sphinx core event "env-updated". Emitted after reading all documents.
+        """
+        # The writer thread is not needed until the next read phase
+        self.rendered_file_writer.shutdown()
+        self.asset_copier.flush()
+        return []
 
     def sphinx_source_read_hook(self, app: PharaohSphinx, docname: str, source: list):
         """
@@ -197,7 +453,7 @@ class PharaohTemplateEnv(jinja2.Environment):
         content[0] = rendered
 
     def render_file(self, docname: Path | str) -> tuple[str, Path]:
-        project: pharaoh.project.PharaohProject = self.sphinx_app.pharaoh_proj
+        project: PharaohProject = self.sphinx_app.pharaoh_proj
 
         if isinstance(docname, str):
             template_file = Path(self.sphinx_app.env.doc2path(docname))
@@ -207,53 +463,132 @@ class PharaohTemplateEnv(jinja2.Environment):
             msg = f"Unsupported type ({type(docname)!r}) for argument 'docname'!"
             raise TypeError(msg)
 
+        # Find component name by parent directory
+        components_dir = project.sphinx_report_project_components
+        try:
+            parts = template_file.relative_to(components_dir).parts
+            component_name = "" if len(parts) < 2 else parts[0]
+        except ValueError:
+            component_name = ""
+        rendered_file = template_file.parent / (template_file.name + ".rendered")
+        write_rendered = project.get_setting("report.write_rendered_files", True)
+
+        if self.render_cache is not None:
+            entry = self.render_cache.get(template_file, project.asset_finder)
+            if entry is not None:
+                log.debug(f"Using cached rendering of {template_file}")
+                self._note_render_record(RenderRecord(set(entry.files), entry.dependencies, set(entry.copied_assets)))
+                if write_rendered:
+                    self.rendered_file_writer.write(rendered_file, entry.rendered)
+                return entry.rendered, rendered_file
+
+        context = self.create_render_context(component_name)
+        record = RenderRecord()
+        self._render_records.append(record)
         try:
-            # Find component name by parent directory
-            components_dir = project.sphinx_report_project_components
-            try:
-                parts = template_file.relative_to(components_dir).parts
-                component_name = "" if len(parts) < 2 else parts[0]
-            except ValueError:
-                component_name = ""
-
             # Context Creation
             log.debug(f"Discovering additional templating context for component {component_name!r}...")
-            self.default_context["project"]["component_name"] = component_name
-            self.default_context["local"] = {}
-
-            for key, ctx in self.read_local_context_files(self.default_context, template_file.parent).items():
+            for key, ctx in self.read_local_context_files(context, template_file.parent).items():
                 log.debug(f"... discovered local context {key!r}")
-                if key in self.default_context["local"]:
-                    log.warning(f"Overwriting existing local context namespace {key!r}!")
-                self.default_context["local"][key] = ctx
-
-            for key, ctx in self.read_asset_context_files(component=component_name):
-                log.debug(f"... discovered asset context {key!r}")
-                if key in self.default_context["local"]:
+                if key in context["local"]:
                     log.warning(f"Overwriting existing local context namespace {key!r}!")
-                self.default_context["local"][key] = ctx
-
-            with chdir(template_file.parent):
-                template = self.select_template([template_file.name], parent=str(template_file.parent))
-                rendered = template.render(
-                    {"ctx": self.default_context}, **self.get_render_globals(project, component_name, template_file)
-                )
-
-            rendered_file = template_file.parent / (template_file.name + ".rendered")
-            rendered_file.write_text(rendered)
-            return rendered, rendered_file
+                context["local"][key] = ctx
+
+            # Record the assets the rendered document depends on, so it is re-read if they change
+            with project.asset_finder.record_lookups() as lookups:
+                for key, asset in self.iter_asset_contexts(component=component_name):
+                    log.debug(f"... discovered asset context {key!r}")
+                    if key in context["local"]:
+                        log.warning(f"Overwriting existing local context namespace {key!r}!")
+                    # Asset contexts are only parsed if the template accesses them
+                    context["local"].set_lazy(key, partial(self.load_asset_context, asset))
+
+                with chdir(template_file.parent):
+                    template = self.select_template([template_file.name], parent=str(template_file.parent))
+                    rendered = template.render(
+                        {"ctx": MappingProxyType(context)},
+                        **self.get_render_globals(project, component_name, template_file),
+                    )
+            deps = dependencies.get_dependencies(self.sphinx_app.env)
+            if deps is not None:
+                deps.add_lookups(lookups)
+            record.dependencies.add_lookups(lookups)
         except Exception:
             log.error(
                 f"Error in PharaohTemplateEnv.sphinx_source_read_hook while trying to render template "
-                f"{template_file} with context {pprint.pformat(self.default_context)}!",
+                f"{template_file} with context {pprint.pformat(context)}!",
                 exc_info=True,
             )
             raise
         finally:
-            self.default_context["local"] = {}
+            self._render_records.remove(record)
+
+        if self.render_cache is not None:
+            self.render_cache.put(template_file, record, rendered)
+        if write_rendered:
+            self.rendered_file_writer.write(rendered_file, rendered)
+        return rendered, rendered_file
+
+    def create_render_context(self, component_name: str) -> dict:
+        """
+        Creates the context ``ctx`` for rendering a single file of a component.
+
+        The default context is not modified, so renderings (e.g. of a document and its includes) cannot affect each
+        other. The project context is read-only.
+        """
+        return {
+            **self.default_context,
+            "project": MappingProxyType({**self.default_context["project"], "component_name": component_name}),
+            "local": LocalContext(),
+        }
+
+    def _load_template(self, name, globals):
+        template = super()._load_template(name, globals)
+        # Also templates loaded from the cache are dependencies of the document that is currently read
+        if template.filename is not None:
+            self._note_dependency(template.filename)
+        return template
+
+    def _note_dependency(self, filename: str | Path):
+        if self.sphinx_app is not None and self.sphinx_app.env is not None:
+            dependencies.note_file(self.sphinx_app.env, str(filename))
+        for record in self._render_records:
+            record.files.add(str(filename))
+
+    def _note_context_listing(self, directory: Path):
+        if self.sphinx_app is not None and self.sphinx_app.env is not None:
+            dependencies.note_context_listing(self.sphinx_app.env, str(directory))
+        for record in self._render_records:
+            record.dependencies.listings[str(directory)] = dependencies.list_context_files(str(directory))
+
+    def _note_render_record(self, record: RenderRecord):
+        # Registers the dependencies of a cached rendering, as if the file was rendered
+        for filename in record.files:
+            self._note_dependency(filename)
+        targets = [r.dependencies for r in self._render_records]
+        if self.sphinx_app is not None and self.sphinx_app.env is not None:
+            deps = dependencies.get_dependencies(self.sphinx_app.env)
+            if deps is not None:
+                targets.append(deps)
+        for deps in targets:
+            deps.update(record.dependencies)
+        if self.sphinx_app is not None:
+            for asset_id in record.copied_assets:
+                asset = self.sphinx_app.pharaoh_proj.asset_finder.get_asset_by_id(asset_id)
+                if asset is not None:
+                    self.copy_asset_to_build(asset)
+
+    def copy_asset_to_build(self, asset: Asset):
+        """
+        Schedules copying an asset to the build directory. Copies are made at the latest after all documents are read.
+        """
+        assert self.sphinx_app is not None
+        for record in self._render_records:
+            record.copied_assets.add(asset.id)
+        self.asset_copier.copy(asset, self.sphinx_app.assets_dir)
 
     def get_render_globals(
-        self, project: pharaoh.project.PharaohProject, component_name: str, template_file: Path
+        self, project: PharaohProject, component_name: str, template_file: Path
     ) -> dict[str, Callable]:
         return {
             "search_error_assets": functools.partial(
@@ -262,6 +597,8 @@ class PharaohTemplateEnv(jinja2.Environment):
                 condition="asset_type == 'error_traceback'",
             ),
             "search_assets": functools.partial(project.asset_finder.search_assets, components=[component_name]),
+            "asset_table": functools.partial(project.asset_finder.asset_table, components=[component_name]),
+            "asset_query": functools.partial(project.asset_finder.asset_query, components=[component_name]),
             "asset_rel_path_from_project": partial(asset_rel_path_from_project, project),
             "asset_rel_path_from_build": partial(asset_rel_path_from_build, self.sphinx_app, template_file),
         }
@@ -295,23 +632,41 @@ class PharaohTemplateEnv(jinja2.Environment):
         Reads all *_context.yaml and executes all *_context.py files to collect additional context data for templating.
         """
         local_context: dict = {}
+        self._note_context_listing(basepath)
         for file in basepath.glob("*_context.yaml"):
             f = Path(file)
+            self._note_dependency(f)
             key = f.name.rsplit("_", 1)[0]
-            with f.open():
-                conf = omegaconf.OmegaConf.load(f)
-                omegaconf.OmegaConf.resolve(conf)
-                local_context[key] = conf
+            local_context[key] = self.load_local_context_file(f)
 
         for file in basepath.glob("*_context.py"):
             f = Path(file)
+            self._note_dependency(f)
             key = f.name.rsplit("_", 1)[0]
-            if f in self.local_context_file_cache:
-                module = self.local_context_file_cache[f]
-            else:
-                module = module_from_file(f)
-                run_module(module, f.read_text(encoding="utf-8"))
-                self.local_context_file_cache[f] = module
+            if key in local_context:
+                log.warning(f"Local context key {key!r} already exists and will be overwritten by {file}")
+            local_context[key] = self.load_local_context_file(f)
+
+        return local_context
+
+    def load_local_context_file(self, file: Path) -> Any:
+        """
+        Loads a *_context.yaml file or executes a *_context.py file and returns its context.
+
+        The result is cached until the modification time of the file changes, so context files are shared between
+        all documents and includes of a directory.
+        """
+        mtime = file.stat().st_mtime_ns
+        cached = self.local_context_file_cache.get(file)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        if file.suffix == ".yaml":
+            context: Any = omegaconf.OmegaConf.load(file)
+            omegaconf.OmegaConf.resolve(context)
+        else:
+            module = module_from_file(file)
+            run_module(module, file.read_text(encoding="utf-8"))
             result_ctx: dict = module.__dict__
             if not ("context" in result_ctx and isinstance(result_ctx["context"], dict)):
                 msg = (
@@ -319,26 +674,46 @@ class PharaohTemplateEnv(jinja2.Environment):
                     "Example of valid script content: context={}"
                 )
                 raise LookupError(msg)
-            if key in local_context:
-                log.warning(f"Local context key {key!r} already exists and will be overwritten by {file}")
-            local_context[key] = result_ctx["context"]
+            context = result_ctx["context"]
 
-        return local_context
+        self.local_context_file_cache[file] = (mtime, context)
+        return context
 
-    def read_asset_context_files(self, component: str) -> Iterator[tuple[str, list | dict]]:
+    def iter_asset_contexts(self, component: str) -> Iterator[tuple[str, Asset]]:
+        """
+        Yields the names and assets of all templating contexts registered by asset scripts of a component.
+        """
         proj = self.sphinx_app.pharaoh_proj
         for asset in proj.asset_finder.search_assets(
             components=[component], condition="pharaoh_templating_context != ''"
         ):
-            suffix = asset.assetfile.suffix.lower()
-            if suffix == ".json":
-                context = asset.read_json()
-            elif suffix == ".yaml":
-                context = asset.read_yaml()
-            else:
-                msg = f"Unsupported file suffix {suffix!r}"
-                raise NotImplementedError(msg)
-            yield asset.context.pharaoh_templating_context, context
+            yield asset.context.pharaoh_templating_context, asset
+
+    def load_asset_context(self, asset: Asset) -> list | dict:
+        """
+        Parses an asset registered via ``register_templating_context``.
+
+        The result is cached until the modification time of the asset file changes.
+        """
+        mtime = asset.assetfile.stat().st_mtime_ns
+        cached = self.asset_context_cache.get(asset.assetfile)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        suffix = asset.assetfile.suffix.lower()
+        if suffix == ".json":
+            context = asset.read_json()
+        elif suffix == ".yaml":
+            context = asset.read_yaml()
+        else:
+            msg = f"Unsupported file suffix {suffix!r}"
+            raise NotImplementedError(msg)
+        self.asset_context_cache[asset.assetfile] = (mtime, context)
+        return context
+
+    def read_asset_context_files(self, component: str) -> Iterator[tuple[str, list | dict]]:
+        for key, asset in self.iter_asset_contexts(component):
+            yield key, self.load_asset_context(asset)
 
 
 def module_from_file(path: str | Path) -> ModuleType:
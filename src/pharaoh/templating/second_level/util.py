@@ -11,7 +11,7 @@ if TYPE_CHECKING:
 
 
 def asset_rel_path_from_build(sphinx_app: PharaohSphinx, template_file: Path, asset: Asset):
-    asset.copy_to(sphinx_app.assets_dir)
+    sphinx_app.pharaoh_te.copy_asset_to_build(asset)
     return (
         Path(os.path.relpath(sphinx_app.confdir, os.path.dirname(template_file)))
         / sphinx_app.assets_dir.name
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import io
 import json
 import os
 import platform
 import re
+import shutil
 import subprocess as sp
 import sys
 from pathlib import Path
@@ -12,7 +14,12 @@ from unittest import mock
 import pytest
 
 from pharaoh.assetlib.api import FileResource
-from pharaoh.assetlib.generation import generate_assets, generate_assets_parallel, register_templating_context
+from pharaoh.assetlib.generation import (
+    generate_assets,
+    generate_assets_parallel,
+    register_asset,
+    register_templating_context,
+)
 
 example_assets = Path(__file__).with_name("_example_assets")
 
@@ -215,6 +222,22 @@ def test_regenerate_assets_partially(new_proj):
             new_proj.generate_assets(("dummy_2",))
 
 
+def test_regenerate_assets_deterministic_names(new_proj):
+    new_proj.put_setting("asset_gen.deterministic_names", True)
+    new_proj.save_settings()
+    new_proj.add_component("dummy_1", "pharaoh_testing.simple", {"test_name": "Dummy 1"})
+    new_proj.generate_assets()
+    ids = sorted(asset.id for asset in new_proj.asset_finder.discover_assets()["dummy_1"])
+    new_proj.generate_assets(("dummy_1",))
+    assert sorted(asset.id for asset in new_proj.asset_finder.discover_assets()["dummy_1"]) == ids
+
+    # The same file registered multiple times still gets unique names
+    asset1 = register_asset("same.txt", data=io.BytesIO(b"1"), component="bla")
+    asset2 = register_asset("same.txt", data=io.BytesIO(b"2"), component="bla")
+    assert asset1.assetfile != asset2.assetfile
+    assert asset1.assetfile.read_bytes() == b"1"
+
+
 def test_execute_asset_script_directly(new_proj):
     new_proj.add_component(
         "dummy_1",
@@ -252,3 +275,59 @@ def test_register_templating_context_by_json_file(new_proj):
     assert "pharaoh_templating_context" in asset.context
     content = asset.read_json()
     assert content == {"foo": "bar"}
+
+
+def test_register_identical_assets_not_deduplicated_by_default(new_proj):
+    asset1 = register_asset("logo.txt", data=io.BytesIO(b"same content"), component="bla")
+    asset2 = register_asset("other.txt", data=io.BytesIO(b"same content"), component="bla")
+
+    assert "content_hash" not in asset1.context.asset
+    assert not os.path.samefile(asset1.assetfile, asset2.assetfile)
+    assert not new_proj.asset_blob_dir.exists()
+
+
+def test_register_identical_assets_deduplicated(new_proj, tmp_path):
+    new_proj.put_setting("asset_gen.deduplicate", True)
+    asset1 = register_asset("logo.txt", data=io.BytesIO(b"same content"), component="bla")
+    asset2 = register_asset("other.txt", data=io.BytesIO(b"same content"), component="bla")
+    asset3 = register_asset("different.txt", data=io.BytesIO(b"different content"), component="bla")
+
+    assert asset1.context.asset.content_hash == asset2.context.asset.content_hash
+    assert asset1.context.asset.content_hash != asset3.context.asset.content_hash
+    assert os.path.samefile(asset1.assetfile, asset2.assetfile)
+    assert not os.path.samefile(asset1.assetfile, asset3.assetfile)
+    assert len(list(new_proj.asset_blob_dir.rglob("*.*"))) == 0
+    assert len([p for p in new_proj.asset_blob_dir.rglob("*") if p.is_file()]) == 2
+
+    # Each asset keeps its own metadata and is copied separately, but its content only once
+    asset1.copy_to(tmp_path / "build")
+    asset2.copy_to(tmp_path / "build")
+    assert len(list((tmp_path / "build").glob("*.assetinfo"))) == 2
+    assert os.path.samefile(tmp_path / "build" / asset1.assetfile.name, tmp_path / "build" / asset2.assetfile.name)
+
+    # Blobs of deleted assets are removed on next asset generation
+    shutil.rmtree(tmp_path / "build")
+    shutil.rmtree(new_proj.asset_build_dir / "bla")
+    new_proj.generate_assets()
+    assert not [p for p in new_proj.asset_blob_dir.rglob("*") if p.is_file()]
+
+
+def test_registered_asset_is_added_to_finder(new_proj):
+    finder = new_proj.asset_finder
+    asset = register_asset("logo.txt", data=io.BytesIO(b"content"), metadata={"foo": "bar"}, component="bla")
+
+    assert new_proj.asset_finder is finder
+    assert finder.get_asset_by_id(asset.id) == asset
+    assert finder.search_assets("foo == 'bar'") == [asset]
+
+
+def test_dumped_asset_is_added_to_finder(new_proj):
+    from pharaoh.assetlib.context import context_stack, metadata_context
+
+    finder = new_proj.asset_finder
+    asset_file = new_proj._build_asset_filepath("plot.txt", "bla")
+    asset_file.write_text("content")
+    with metadata_context(asset={"name": asset_file.name}, label="exported"):
+        context_stack.dump(asset_file)
+
+    assert [asset.assetfile for asset in finder.search_assets("label == 'exported'")] == [asset_file]
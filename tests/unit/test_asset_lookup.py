@@ -2,13 +2,27 @@ from __future__ import annotations
 
 import json
 import os
+import pickle
+import threading
+import time
 from typing import TYPE_CHECKING
 
 import omegaconf
 import pytest
 
-from pharaoh.assetlib.finder import Asset, AssetFileLinkBrokenError, AssetFinder, obj_groupby
-from pharaoh.templating.second_level.env_filters import oc_get
+from pharaoh.assetlib import finder
+from pharaoh.assetlib.finder import (
+    Asset,
+    AssetFileLinkBrokenError,
+    AssetFinder,
+    copy_assets,
+    obj_groupby,
+    sync_assets,
+)
+from pharaoh.assetlib.metadata import MetadataView
+from pharaoh.assetlib.query import compile_query
+from pharaoh.assetlib.watch import paused_watchers
+from pharaoh.templating.second_level.env_filters import oc_get, oc_resolve
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -48,6 +62,49 @@ def test_asset_discover(dummy_assetdir):
         al.discover_assets()
 
 
+def test_asset_discover_lazy(dummy_assetdir, mocker):
+    component_dir = dummy_assetdir / "component_xyz"
+    (component_dir / "archive.assetinfo").write_text(json.dumps({"a": 2}))
+    (component_dir / "archive.tar.gz").touch()
+    (component_dir / "archive_2.txt").touch()
+    index_file = dummy_assetdir.parent / "index"
+    AssetFinder(dummy_assetdir, index_file=index_file)
+
+    read_metadata = mocker.spy(Asset, "read_metadata")
+    al = AssetFinder(dummy_assetdir, index_file=index_file)
+    assert read_metadata.call_count == 0
+    assert al.get_asset_by_stem("archive").assetfile.name == "archive.tar.gz"
+
+    assert all(asset._context is None for asset in al.iter_assets())
+
+    (asset,) = al.search_assets("a == 2")
+    assert asset.context.a == 2
+    assert read_metadata.call_count == 0
+    assert sum(asset._context is not None for asset in al.iter_assets()) == 1
+
+
+def test_asset_metadata_view(dummy_assetdir):
+    al = AssetFinder(dummy_assetdir)
+    asset = al.get_asset_by_stem("a")
+    assert isinstance(asset.context, MetadataView)
+    assert asset.context.d.e == asset.context["d"]["e"] == 4
+    assert asset.context == {"a": 1, "b": 2, "d": {"e": 4, "f": 5}}
+    assert "b" in asset.context
+    assert asset.context.get("x", 1) == 1
+    with pytest.raises(AttributeError):
+        asset.context.x  # noqa: B018
+    with pytest.raises(TypeError):
+        asset.context.a = 2
+    assert pickle.loads(pickle.dumps(asset)).context == asset.context
+    assert oc_get(asset.context, "d.f") == 5
+    assert oc_resolve(asset.context) == {"a": 1, "b": 2, "d": {"e": 4, "f": 5}}
+    assert not hasattr(asset, "__dict__")
+
+    create_asset(dummy_assetdir / "component_xyz", "c", a="${b}", b=3)
+    al.discover_assets()
+    assert al.get_asset_by_stem("c").context.a == 3
+
+
 def test_asset_copy(tmp_path):
     src = tmp_path / "src"
     src.mkdir()
@@ -78,6 +135,105 @@ def test_asset_copy(tmp_path):
     assert len(list(dst2.rglob("*"))) == 3
 
 
+def test_sync_assets(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    dst = tmp_path / "dst"
+
+    (src / "asset1.assetinfo").write_text(json.dumps({"name": "asset1"}))
+    (src / "asset1.txt").write_text("content")
+    asset1 = Asset(src / "asset1.assetinfo")
+    (src / "asset2.assetinfo").write_text(json.dumps({"name": "asset2"}))
+    (src / "asset2").mkdir()
+    (src / "asset2" / "a.txt").write_text("a")
+    (src / "asset2" / "b.txt").write_text("b")
+    asset2 = Asset(src / "asset2.assetinfo")
+
+    assert sync_assets([asset1, asset2], dst) == (2, 0)
+    assert sync_assets([asset1, asset2], dst) == (0, 0)
+
+    # Changed, removed and orphaned files are synchronized
+    (dst / "orphan.txt").write_text("orphan")
+    (src / "asset2" / "b.txt").unlink()
+    (src / "asset2" / "c.txt").write_text("c")
+    assert sync_assets([asset1], dst, keep=[asset2]) == (0, 1)
+    assert sync_assets([asset2], dst, keep=[asset1]) == (1, 0)
+    assert sorted(p.name for p in (dst / "asset2").iterdir()) == ["a.txt", "c.txt"]
+    assert sorted(p.name for p in dst.iterdir()) == ["asset1.assetinfo", "asset1.txt", "asset2", "asset2.assetinfo"]
+
+    # Copies of the info files are never hardlinks, updating them does not modify the source
+    (src / "asset1.assetinfo").write_text(json.dumps({"name": "asset1", "version": 2}))
+    assert sync_assets([asset1], dst, keep=[asset2]) == (1, 0)
+    assert json.loads((dst / "asset1.assetinfo").read_text())["version"] == 2
+
+
+def test_copy_assets_ignores_copies_of_previous_operations(tmp_path, monkeypatch):
+    # Simulate a target directory on another file system, where assets can't be linked to their source
+    monkeypatch.setitem(finder._LINK_FUNCTIONS, "auto", ())
+    src = tmp_path / "src"
+    src.mkdir()
+    assets = []
+    for name in ("asset1", "asset2", "asset3"):
+        (src / f"{name}.assetinfo").write_text(json.dumps({"name": name, "asset": {"content_hash": "abc"}}))
+        (src / f"{name}.txt").write_text("content")
+        assets.append(Asset(src / f"{name}.assetinfo"))
+
+    dst = tmp_path / "dst"
+    assert copy_assets(assets[:1], dst) == 1
+    assert not os.path.samefile(dst / "asset1.txt", src / "asset1.txt")
+
+    # Copies from previous operations are never linked to, they might have been modified in the meantime
+    (dst / "asset1.txt").write_text("changed")
+    assert copy_assets(assets[1:], dst) == 2
+    assert (dst / "asset2.txt").read_text() == "content"
+    assert not os.path.samefile(dst / "asset1.txt", dst / "asset3.txt")
+    assert (dst / "asset3.txt").read_text() == "content"
+
+
+def test_copied_blobs_skips_modified_copies(tmp_path):
+    src = tmp_path / "src.txt"
+    src.write_text("content")
+    dst = tmp_path / "dst"
+    dst.mkdir()
+    blobs = finder._CopiedBlobs()
+
+    finder._link_or_copy(src, dst / "a.txt", "abc", blobs=blobs)
+    finder._link_or_copy(src, dst / "b.txt", "abc", blobs=blobs)
+    assert os.path.samefile(dst / "a.txt", dst / "b.txt")
+
+    (dst / "a.txt").unlink()
+    (dst / "a.txt").write_text("changed content")
+    finder._link_or_copy(src, dst / "c.txt", "abc", blobs=blobs)
+    assert (dst / "c.txt").read_text() == "content"
+    assert not os.path.samefile(dst / "a.txt", dst / "c.txt")
+
+
+@pytest.mark.parametrize("strategy", ["auto", "hardlink", "reflink", "symlink", "copy"])
+def test_asset_copy_strategies(tmp_path, strategy):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "asset.assetinfo").write_text(json.dumps({"name": "asset"}))
+    (src / "asset.txt").write_text("content")
+    asset = Asset(src / "asset.assetinfo")
+
+    asset_path = asset.copy_to(tmp_path / "dst", strategy)
+    assert asset_path.read_text() == "content"
+    assert not (tmp_path / "dst" / "asset.assetinfo").is_symlink()
+    assert asset_path.is_symlink() == (strategy == "symlink")
+    if strategy in ("auto", "hardlink"):
+        assert os.path.samefile(asset_path, asset.assetfile)
+    if strategy in ("reflink", "copy"):
+        assert not os.path.samefile(asset_path, asset.assetfile)
+    assert not asset.sync_to(tmp_path / "dst", strategy)
+
+    # Switching the strategy replaces symlinks
+    assert asset.sync_to(tmp_path / "dst", "copy") == (strategy == "symlink")
+    assert not asset_path.is_symlink()
+
+    with pytest.raises(ValueError, match="Unknown copy strategy"):
+        asset.copy_to(tmp_path / "dst2", "invalid")
+
+
 def test_asset_search(dummy_assetdir):
     al = AssetFinder(dummy_assetdir)
     results = al.search_assets("a == 1")
@@ -95,6 +251,358 @@ def test_asset_search(dummy_assetdir):
     assert asset.id == results[0].id
 
 
+@pytest.mark.parametrize(
+    ("condition", "indexed"),
+    [
+        ("a == 1", True),
+        ("1 == a", True),
+        ("a != 1", True),
+        ("a == 1 and d.e == 5", True),
+        ("d.e in (4, 5) and not c", True),
+        ("d.e not in [4]", True),
+        ("s.startswith('foo')", True),
+        ("s.endswith(('bar', 'baz'))", True),
+        ("not s.startswith('foo')", True),
+        ("c is None", True),
+        ("c is not None", True),
+        ("l", True),
+        ("d", True),
+        ("not d", True),
+        ("d == 1", True),
+        ("d.e.real == 4", True),
+        ("l.index", True),
+        ("i", True),
+        ("i == 'x'", True),
+        ("a == 1 or c == 3", True),
+        ("not (a == 1 or c == 3) or not b", True),
+        ("c or d.f", True),
+        ("d.e > 4", True),
+        ("4 < d.e", True),
+        ("s >= 'foo'", True),
+        ("a <= 1 and not d.e < 4.5", True),
+        ("'e' in d", True),
+        ("'foo' in s", True),
+        ("'f' not in d and 'x' not in s", True),
+        ("1 in l", False),
+        ("'x' in l", True),
+        ("len(s) == 6", False),
+        ("len(s) == 6 or a == 1", False),
+        ("a == 1 and len(s) == 6", False),
+        ("not (d.e == 4 and s.upper() == 'FOOBAR')", False),
+        ("id", False),
+        ("d.keys", False),
+        ("1 < a < 3", False),
+    ],
+)
+def test_indexed_search_matches_eval(tmp_path, condition, indexed):
+    component_dir = tmp_path / "assets" / "comp"
+    component_dir.mkdir(parents=True)
+    create_asset(component_dir, "a", a=1, b=2, d={"e": 4, "f": 5}, s="foobar", l=[1], i="${s}")
+    create_asset(component_dir, "b", a=1, c=3, d={"e": 5, "f": 6}, s="barbaz", l=[])
+    create_asset(component_dir, "c", a=True, c=None, d={}, s="foo", i="x")
+    create_asset(component_dir, "d", a="1", d={"e": 4.0}, s=1)
+    create_asset(component_dir, "e", a=2, d={"e": "x", "f": None}, l=["x"], s=None)
+    create_asset(component_dir, "f", b=0, d=[1], s={"foo": 1})
+
+    finder = AssetFinder(tmp_path / "assets")
+    assert compile_query(condition).is_indexed is indexed
+
+    expected = []
+    failed = 0
+    for asset in finder.iter_assets():
+        try:
+            result = eval(condition, {}, asset.context)
+        except Exception:
+            result = False
+            failed += 1
+        if result:
+            expected.append(asset)
+    assert sorted(finder.search_assets(condition)) == sorted(expected)
+    errors = finder.query_errors(condition)
+    assert (errors.count if errors else 0) == failed
+
+
+def test_asset_search_errors(dummy_assetdir):
+    al = AssetFinder(dummy_assetdir)
+    assert al.query_errors("lable == 'x'") is None
+    assert al.search_assets("lable == 'x'") == []
+    errors = al.query_errors("lable == 'x'")
+    assert (errors.count, errors.total) == (2, 2)
+    assert errors.message == "NameError: name 'lable' is not defined"
+
+    assert len(al.search_assets("d.e == 4 or a == 1", "component_xyz")) == 2
+    assert al.query_errors("d.e == 4 or a == 1", "component_xyz") is None
+    assert len(al.search_assets("c == 3")) == 1
+    errors = al.query_errors("c == 3")
+    assert (errors.count, errors.total) == (1, 2)
+    assert "'c'" in errors.message
+
+
+def test_persistent_asset_index(tmp_path, mocker):
+    component_dir = tmp_path / "assets" / "comp"
+    component_dir.mkdir(parents=True)
+    create_asset(component_dir, "a", a=1)
+    index_file = tmp_path / "index"
+
+    AssetFinder(tmp_path / "assets", index_file=index_file)
+    assert index_file.exists()
+
+    finder = AssetFinder(tmp_path / "assets", index_file=index_file)
+    build = mocker.spy(finder._index, "build")
+    finder.discover_assets()
+    build.assert_not_called()
+
+    create_asset(component_dir, "b", a=1)
+    finder.discover_assets()
+    build.assert_called_once()
+    assert len(finder.search_assets("a == 1")) == 2
+    assert len(AssetFinder(tmp_path / "assets", index_file=index_file).search_assets("a == 1")) == 2
+
+
+def test_asset_lookup_by_id_and_stem(dummy_assetdir):
+    al = AssetFinder(dummy_assetdir)
+    asset = al.get_asset_by_stem("a")
+    assert asset.infofile.stem == "a"
+    assert al.get_asset_by_id(asset.id) is asset
+    assert al.get_asset_by_stem("x") is None
+    assert al.get_asset_by_id("__ID__x") is None
+
+    new_asset = create_asset(dummy_assetdir / "component_xyz", "c", a=1, c=4)
+    assert al.get_asset_by_stem("c") is None
+    al.add_asset(new_asset)
+    al.add_asset(new_asset)
+    assert al.get_asset_by_id(new_asset.id) is new_asset
+    assert len(list(al.iter_assets("component_xyz"))) == 3
+    assert al.search_assets("c == 4") == [new_asset]
+
+    (dummy_assetdir / "component_xyz" / "c.assetinfo").unlink()
+    al.discover_assets(["component_xyz"])
+    assert al.get_asset_by_id(new_asset.id) is None
+    assert al.get_asset_by_stem("a") is not None
+
+
+def test_asset_search_cache(dummy_assetdir, mocker):
+    al = AssetFinder(dummy_assetdir)
+    index_lookup = mocker.spy(al._index, "get")
+
+    results = al.search_assets("a == 1", ["component_xyz"])
+    assert len(results) == 2
+    results.clear()  # the cached result must not be affected
+    assert len(al.search_assets("a == 1", ("component_xyz",))) == 2
+    assert len(al.search_assets("a == 1", "component_xyz")) == 2
+    assert index_lookup.call_count == 1
+
+    create_asset(dummy_assetdir / "component_xyz", "c", a=1)
+    assert len(al.search_assets("a == 1", "component_xyz")) == 2
+    al.discover_assets()
+    assert len(al.search_assets("a == 1", "component_xyz")) == 3
+    assert index_lookup.call_count == 2
+
+
+def test_asset_search_many(dummy_assetdir, mocker):
+    al = AssetFinder(dummy_assetdir)
+    index_lookup = mocker.spy(al._index, "get")
+
+    a1, c3, none, empty, a1_again = al.search_many(["a == 1", "c == 3", "a == 2", "", "a == 1"], "component_xyz")
+    assert sorted(asset.infofile.stem for asset in a1) == ["a", "b"]
+    assert [asset.infofile.stem for asset in c3] == ["b"]
+    assert none == empty == []
+    assert a1_again == a1
+    assert index_lookup.call_count == 1
+
+    # Cached by search_many
+    assert len(al.search_assets("c == 3", "component_xyz")) == 1
+    assert index_lookup.call_count == 1
+    # Multiple conditions are OR-ed
+    assert sorted(asset.infofile.stem for asset in al.search_assets(["c == 3", "b == 2"])) == ["a", "b"]
+
+
+def test_collect_directive_filters():
+    from pharaoh.templating.second_level.sphinx_ext.asset_ext import collect_directive_filters
+
+    text = """
+Title
+=====
+
+.. pharaoh-asset:: label == "a"
+
+.. pharaoh-asset::
+    :filter: asset.suffix == ".png";
+        label == "b"
+    :components: comp_a, _this_
+    :optional:
+
+.. pharaoh-asset:: {{ my_filter }}
+
+.. only:: html
+
+    .. pharaoh-asset:: label == "c"
+        :index: 0
+
+        x > 1
+
+.. pharaoh-asset:: __ID__1234
+"""
+    assert collect_directive_filters(text) == [
+        (['label == "a"'], "_this_"),
+        (['asset.suffix == ".png"', 'label == "b"'], "comp_a, _this_"),
+        (["x > 1", 'label == "c"'], "_this_"),
+    ]
+
+
+def test_asset_finder_refresh(dummy_assetdir, mocker):
+    def touch(directory):
+        # Directory timestamps may be too coarse to detect changes made right after discovery
+        stat = directory.stat()
+        os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    al = AssetFinder(dummy_assetdir)
+    assert al.refresh() == []
+
+    component_dir = dummy_assetdir / "component_xyz"
+    create_asset(component_dir, "c", a=1)
+    touch(component_dir)
+    new_component_dir = dummy_assetdir / "component_new"
+    new_component_dir.mkdir()
+    create_asset(new_component_dir, "d", a=1)
+
+    discover = mocker.spy(al, "_discover_component")
+    assert al.refresh() == ["component_new", "component_xyz"]
+    assert discover.call_count == 2
+    assert len(al.search_assets("a == 1")) == 4
+
+    for file in new_component_dir.iterdir():
+        file.unlink()
+    new_component_dir.rmdir()
+    assert al.refresh() == ["component_new"]
+    assert len(al.search_assets("a == 1")) == 3
+
+    # Polling watcher
+    watcher = al.watch(interval=0, use_watchdog=False)
+    assert watcher.backend == "polling"
+    create_asset(component_dir, "e", a=1)
+    touch(component_dir)
+    assert len(al.search_assets("a == 1")) == 4
+    al.unwatch()
+    create_asset(component_dir, "f", a=1)
+    touch(component_dir)
+    assert len(al.search_assets("a == 1")) == 4
+
+
+def test_asset_finder_watchdog(dummy_assetdir):
+    pytest.importorskip("watchdog")
+
+    al = AssetFinder(dummy_assetdir)
+    count = len(al.search_assets("a == 1"))
+    watcher = al.watch()
+    try:
+        assert watcher.backend == "watchdog"
+        create_asset(dummy_assetdir / "component_xyz", "c", a=1)
+        # File system events are delivered by another thread
+        deadline = time.monotonic() + 10
+        while len(al.search_assets("a == 1")) == count and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert len(al.search_assets("a == 1")) == count + 1
+    finally:
+        al.unwatch()
+
+
+def test_asset_finder_watch_paused(dummy_assetdir):
+    pytest.importorskip("watchdog")
+
+    al = AssetFinder(dummy_assetdir)
+    al.watch()
+    try:
+        with paused_watchers():
+            assert "pharaoh_asset_watcher" not in [thread.name for thread in threading.enumerate()]
+            create_asset(dummy_assetdir / "component_xyz", "c", a=1)
+        assert "pharaoh_asset_watcher" in [thread.name for thread in threading.enumerate()]
+        # Changes made while paused are detected, although their events were missed
+        assert len(al.search_assets("a == 1")) == 3
+    finally:
+        al.unwatch()
+
+
+def test_asset_table(tmp_path):
+    component_dir = tmp_path / "assets" / "comp"
+    component_dir.mkdir(parents=True)
+    for i, (vdd, iout) in enumerate([(8, 1), (8, 2), (10, 1), (10, 2)]):
+        create_asset(component_dir, f"plot{i}", asset={"index": 4 - i}, vdd=vdd, iout=iout, signal="idd")
+    create_asset(component_dir, "other", asset={"index": 0}, signal="${asset.index}")
+
+    al = AssetFinder(tmp_path / "assets")
+    table = al.asset_table()
+    assert len(table) == 5
+    assert table.first().infofile.stem == "other"
+    assert table.column("vdd") == [None, 10, 10, 8, 8]
+    assert table.column("signal") == [0, "idd", "idd", "idd", "idd"]
+    assert {"asset.index", "iout", "signal", "vdd"} == set(table.columns)
+
+    idd = table.where("signal == 'idd'")
+    assert len(idd) == 4
+    assert len(table.where("signal == 0")) == 1
+    assert [a.infofile.stem for a in idd.order_by("iout", reverse=True).where("vdd == 8")] == ["plot1", "plot0"]
+
+    groups = idd.group_by("vdd")
+    assert list(groups) == [8, 10]
+    assert [a.infofile.stem for a in groups[8]] == ["plot1", "plot0"]
+    assert set(table.group_by("vdd", default="none")) == {8, 10, "none"}
+    assert set(table.group_by("signal")) == {0, "idd"}
+
+    pytest.importorskip("pandas")
+    df = al.asset_table("vdd == 10", "comp").to_dataframe()
+    assert list(df["iout"]) == [2, 1]
+
+
+def test_asset_table_keeps_equal_values_of_different_types(tmp_path):
+    component_dir = tmp_path / "assets" / "comp"
+    component_dir.mkdir(parents=True)
+    for i, x in enumerate([1, True, 1.0]):
+        create_asset(component_dir, f"a{i}", asset={"index": i}, x=x)
+
+    table = AssetFinder(tmp_path / "assets").asset_table().order_by("asset.index")
+    assert [(type(x), x) for x in table.column("x")] == [(int, 1), (bool, True), (float, 1.0)]
+    assert [(type(x), x) for x in table.order_by("x").column("x")] == [(int, 1), (bool, True), (float, 1.0)]
+
+
+def test_asset_table_order_by_mixed_types(tmp_path):
+    component_dir = tmp_path / "assets" / "comp"
+    component_dir.mkdir(parents=True)
+    for i, x in enumerate([2, "b", 10, None]):
+        create_asset(component_dir, f"a{i}", x=x)
+    create_asset(component_dir, "a4")
+
+    table = AssetFinder(tmp_path / "assets").asset_table()
+    assert table.order_by("x").column("x") == [10, 2, "b", None, None]
+    assert table.order_by("x", reverse=True).column("x") == ["b", 2, 10, None, None]
+    assert table.order_by("x", default="a").column("x", "a") == [10, 2, "a", "b", None]
+
+
+def test_asset_query(tmp_path, mocker):
+    component_dir = tmp_path / "component_xyz"
+    component_dir.mkdir()
+    for i, (vdd, iout) in enumerate([(1, 3), (2, 1), (1, 2), (2, 2)]):
+        create_asset(component_dir, f"a{i}", asset={"index": i, "suffix": ".txt"}, vdd=vdd, iout=iout)
+    finder = AssetFinder(tmp_path)
+    search = mocker.spy(finder, "search_assets")
+
+    query = finder.asset_query("vdd == 1").where("iout > 1").order_by("iout", reverse=True)
+    assert search.call_count == 0
+    assert query.condition == "(vdd == 1) and (iout > 1)"
+    assert [asset.infofile.stem for asset in query] == ["a0", "a2"]
+    assert query.first().infofile.stem == "a0"
+    assert len(query) == 2
+    assert search.call_count == 1
+
+    groups = finder.asset_query().order_by("iout").group_by("vdd")
+    assert {vdd: [asset.infofile.stem for asset in table] for vdd, table in groups.items()} == {
+        1: ["a2", "a0"],
+        2: ["a1", "a3"],
+    }
+    assert not finder.asset_query("vdd == 3")
+    assert finder.asset_query("vdd == 3").first() is None
+
+
 def test_obj_groupby():
     persons = [
         omegaconf.OmegaConf.create({"name": "Charlie", "stats": {"gender": "M"}}),
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import json
 import os
 import re
+import shutil
+import threading
 from unittest import mock
 
 import pytest
+from sphinx.errors import ExtensionError
 
 from pharaoh.api import FileResource, PharaohProject
+from pharaoh.templating.second_level.sphinx_ext import asset_ext
 
 
 def test_build_empty_project(new_proj):
@@ -170,6 +175,29 @@ def test_build_project_with_template_file_without_docstring(new_proj, tmp_path,
     assert not (new_proj.sphinx_report_project_components / "dummy/index_tmpl.rst").exists()
 
 
+def test_build_project_warns_about_failing_asset_filters(new_proj, tmp_path, caplog):
+    tmpl_file = tmp_path / "mytemplate" / "tmpl.pharaoh.py"
+    tmpl_file.parent.mkdir(parents=True)
+    tmpl_file.write_text(
+        '''
+"""
+.. pharaoh-asset:: lable == "my_text"
+    :optional:
+"""
+import io
+
+from pharaoh.assetlib.api import register_asset
+
+register_asset("text.txt", {"label": "my_text"}, template="raw_txt", data=io.BytesIO(b"text"))
+'''
+    )
+
+    new_proj.add_component("dummy", ["pharaoh_testing.template_file", str(tmpl_file)])
+    new_proj.generate_assets()
+    assert new_proj.build_report() == 1
+    assert "Asset filter 'lable == \"my_text\"' failed for all 1 assets: NameError" in caplog.text
+
+
 def test_build_project_with_template_directory(new_proj, tmp_path):
     tmpl_file = tmp_path / "mytemplate" / "index.rst"
     tmpl_file.parent.mkdir(parents=True)
@@ -189,6 +217,43 @@ def test_build_project_manual_asset_include(new_proj, tmp_path):
     assert status == 0
 
 
+def test_build_project_syncs_shared_assets(new_proj):
+    new_proj.add_component("dummy", ["pharaoh_testing.manual_asset_include"])
+    new_proj.generate_assets()
+    assert new_proj.build_report() == 0
+    assets_dir = new_proj.sphinx_report_build / "pharaoh_assets"
+    copied_assets = sorted(assets_dir.glob("*"))
+    stamps = [p.stat().st_mtime_ns for p in copied_assets]
+
+    # Unchanged assets are kept, orphans are removed
+    (assets_dir / "orphan.html").write_text("orphan")
+    assert new_proj.build_report() == 0
+    assert sorted(assets_dir.glob("*")) == copied_assets
+    assert [p.stat().st_mtime_ns for p in copied_assets] == stamps
+
+
+def test_build_project_asset_copy_strategy(new_proj):
+    new_proj.put_setting("report.asset_copy_strategy", "symlink")
+    new_proj.put_setting("report.render_cache", True)
+    new_proj.add_component("dummy", ["pharaoh_testing.manual_asset_include"])
+    new_proj.generate_assets()
+    assert new_proj.build_report() == 0
+    assets_dir = new_proj.sphinx_report_build / "pharaoh_assets"
+    (asset_file,) = [p for p in assets_dir.glob("*") if p.suffix != ".assetinfo"]
+    assert asset_file.is_symlink()
+    assert not (assets_dir / (asset_file.stem + ".assetinfo")).is_symlink()
+
+    # Assets copied by cached renderings are copied again
+    shutil.rmtree(new_proj.sphinx_report_build)
+    assert new_proj.build_report() == 0
+    assert asset_file.is_symlink()
+
+    new_proj.put_setting("report.asset_copy_strategy", "invalid")
+    new_proj.save_settings()
+    with pytest.raises(ExtensionError, match="asset_copy_strategy"):
+        new_proj.build_report(catch_errors=False)
+
+
 def test_template_file_and_folder_names(new_proj, tmp_path):
     new_proj.add_component(
         "dummy",
@@ -224,7 +289,7 @@ def test_build_project_with_custom_built_time_templates(tmp_path):
     assert "Paragraph from component" in dummy2_index_content
 
 
-def test_error_report_component_with_errors(new_proj):
+def test_error_report_component_with_errors(new_proj, caplog):
     TITLE = "Report Errors"
 
     new_proj.add_component("dummy", "pharaoh_testing.render_asset_error")
@@ -233,6 +298,13 @@ def test_error_report_component_with_errors(new_proj):
     status = new_proj.build_report()
     # new_proj.open_report()
     assert status == 1  # should fail because of warnings
+    # Each asset generation error is only warned once
+    generation_errors = [
+        record.getMessage()
+        for record in caplog.records
+        if "WARNING: An error occurred during asset generation" in record.getMessage()
+    ]
+    assert len(generation_errors) == 2
 
     dummy_index_content = (new_proj.sphinx_report_build / "components/dummy/index.html").read_text(encoding="utf-8")
     assert "This is a ValueError" in dummy_index_content
@@ -254,3 +326,127 @@ def test_error_report_component_without_errors(new_proj):
 
     errors_index_content = (new_proj.sphinx_report_build / "components/errors/index.html").read_text(encoding="utf-8")
     assert "No errors found!" in errors_index_content
+
+
+def test_build_project_incremental(new_proj):
+    new_proj.add_component("dummy_1", "pharaoh_testing.simple", {"test_name": "Dummy 1"})
+    new_proj.add_component("dummy_2", "pharaoh_testing.simple", {"test_name": "Dummy 2", "all_components": False})
+    new_proj.generate_assets()
+    assert new_proj.build_report() == 0
+    assert (new_proj.sphinx_report_build / ".doctrees" / "environment.pickle").is_file()
+    assert any(new_proj.jinja_cache_dir.iterdir())
+
+    c1_html = new_proj.sphinx_report_build / "components/dummy_1/index.html"
+    c2_html = new_proj.sphinx_report_build / "components/dummy_2/index.html"
+    c1_mtime, c2_mtime = c1_html.stat().st_mtime_ns, c2_html.stat().st_mtime_ns
+
+    # Nothing changed
+    assert new_proj.build_report() == 0
+    assert c1_html.stat().st_mtime_ns == c1_mtime
+    assert c2_html.stat().st_mtime_ns == c2_mtime
+
+    # Regenerating the assets of dummy_2 only affects dummy_1 (includes assets of all components) and dummy_2
+    new_proj.generate_assets(["dummy_2"])
+    assert new_proj.build_report() == 0
+    assert c1_html.stat().st_mtime_ns != c1_mtime
+    assert c2_html.stat().st_mtime_ns != c2_mtime
+    c1_mtime, c2_mtime = c1_html.stat().st_mtime_ns, c2_html.stat().st_mtime_ns
+
+    new_proj.generate_assets(["dummy_1"])
+    assert new_proj.build_report() == 0
+    assert c1_html.stat().st_mtime_ns != c1_mtime
+    assert c2_html.stat().st_mtime_ns == c2_mtime
+
+
+def test_build_project_render_cache(new_proj):
+    new_proj.put_setting("report.render_cache", True)
+    new_proj.put_setting("report.fresh_env", True)
+    new_proj.add_component("dummy_1", "pharaoh_testing.simple", {"test_name": "Dummy 1"})
+    new_proj.add_component("dummy_2", "pharaoh_testing.simple", {"test_name": "Dummy 2"})
+    new_proj.generate_assets()
+    assert new_proj.build_report() == 0
+
+    def cache_entries():
+        return {path.name: path.stat().st_mtime_ns for path in new_proj.render_cache_dir.iterdir()}
+
+    entries = cache_entries()
+    assert entries
+
+    # All documents are read again, but their renderings are taken from the cache
+    assert new_proj.build_report() == 0
+    assert cache_entries() == entries
+
+    context_file = new_proj.sphinx_report_project_components / "dummy_1" / "test_context.yaml"
+    context_file.write_text(context_file.read_text(encoding="utf-8").replace("Dummy 1", "Dummy One"))
+    assert new_proj.build_report() == 0
+    changed = {name for name, mtime in cache_entries().items() if entries.get(name) != mtime}
+    assert len(changed) == 1
+    html = new_proj.sphinx_report_build / "components/dummy_1/index.html"
+    assert "Dummy One" in html.read_text(encoding="utf-8")
+
+
+def test_build_project_render_cache_copies_assets(new_proj):
+    new_proj.put_setting("report.render_cache", True)
+    new_proj.add_component("dummy", ["pharaoh_testing.manual_asset_include"])
+    new_proj.generate_assets()
+    assert new_proj.build_report() == 0
+    assets_dir = new_proj.sphinx_report_build / "pharaoh_assets"
+    copied_assets = sorted(path.name for path in assets_dir.iterdir())
+    assert copied_assets
+    entries = {path.name: path.stat().st_mtime_ns for path in new_proj.render_cache_dir.iterdir()}
+
+    # The template copies the asset via asset_rel_path_from_build, which is not called for cached renderings
+    shutil.rmtree(new_proj.sphinx_report_build)
+    assert new_proj.build_report() == 0
+    assert {path.name: path.stat().st_mtime_ns for path in new_proj.render_cache_dir.iterdir()} == entries
+    assert sorted(path.name for path in assets_dir.iterdir()) == copied_assets
+
+
+@pytest.mark.parametrize("watch_assets", [False, True])
+def test_build_project_prerender(new_proj, caplog, watch_assets):
+    new_proj.put_setting("asset_gen.watch_assets", watch_assets)
+    new_proj.save_settings()
+    new_proj.add_component("dummy_1", "pharaoh_testing.simple", {"test_name": "Dummy 1"})
+    new_proj.generate_assets()
+    assert new_proj.build_report(prerender=True) == 0
+    assert "Prerendering skipped" not in caplog.text
+    # The documents were rendered by the worker processes and Sphinx took them from a temporary render cache
+    index_rst = new_proj.sphinx_report_project_components / "dummy_1" / "index.rst"
+    assert f"Using cached rendering of {index_rst}" in caplog.text
+    assert not new_proj.render_cache_dir.exists()
+    html = new_proj.sphinx_report_build / "components/dummy_1/index.html"
+    assert "Dummy 1" in html.read_text(encoding="utf-8")
+
+
+def test_build_project_prerender_skipped_with_background_threads(new_proj, caplog):
+    new_proj.add_component("dummy_1", "pharaoh_testing.simple", {"test_name": "Dummy 1"})
+    new_proj.generate_assets()
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait, name="pharaoh_other")
+    thread.start()
+    try:
+        assert new_proj.build_report(prerender=True) == 0
+    finally:
+        stop.set()
+        thread.join()
+    (skipped,) = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Prerendering skipped")]
+    assert "pharaoh_other" in skipped
+    assert "Using cached rendering" not in caplog.text
+
+
+def test_build_project_with_asset_fragments(new_proj):
+    new_proj.put_setting("asset_gen.render_fragments", True)
+    new_proj.add_component("dummy_1", "pharaoh_testing.simple", {"test_name": "Dummy 1"})
+    new_proj.generate_assets()
+    assets = new_proj.asset_finder.search_assets("label == 'PLOTLY'", ["dummy_1"])
+    assert len(assets) == 1
+    assert assets[0].fragmentfile.is_file()
+    assert assets[0].fragmentfile not in {asset.assetfile for asset in new_proj.asset_finder.iter_assets()}
+    fragment = json.loads(assets[0].fragmentfile.read_text(encoding="utf-8"))["rst"]
+
+    with mock.patch.object(asset_ext, "fill_asset_fragment", wraps=asset_ext.fill_asset_fragment) as fill:
+        assert new_proj.build_report() == 0
+    assert fragment in [call.args[0] for call in fill.call_args_list]
+    html = (new_proj.sphinx_report_build / "components/dummy_1/index.html").read_text(encoding="utf-8")
+    assert "@@pharaoh" not in html
+    assert "plotly-graph-div" in html
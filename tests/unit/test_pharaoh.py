@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import logging
 from typing import TYPE_CHECKING
 
 import omegaconf
@@ -87,6 +88,14 @@ def test_find_components(new_proj):
     assert len(new_proj.find_components()) == 2
 
 
+def test_find_components_logs_errors(new_proj, caplog):
+    new_proj.add_component("empty1", "pharaoh_testing.simple", metadata={"foo": "bar"})
+
+    with caplog.at_level(logging.DEBUG, logger="pharaoh"):
+        assert new_proj.find_components("metdata.foo == 'bar'") == []
+    assert "NameError: name 'metdata' is not defined" in caplog.text
+
+
 def test_archive_report(new_proj, tmp_path):
     assert new_proj.build_report() == 0
 
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import urllib.request
+
+from pharaoh.serve import RELOAD_SCRIPT, ReportServer
+
+
+def test_serve_incremental_rebuild(new_proj):
+    new_proj.add_component("dummy_1", "pharaoh_testing.simple", {"test_name": "Dummy 1"})
+    new_proj.generate_assets()
+
+    server = ReportServer(new_proj, port=0)
+    server.start()
+    try:
+        with urllib.request.urlopen(server.url + "components/dummy_1/index.html") as response:
+            page = response.read().decode("utf-8")
+        assert RELOAD_SCRIPT in page
+        assert "Dummy 1" in page
+        assert not server.poll()
+
+        index_rst = new_proj.sphinx_report_project_components / "dummy_1" / "index.rst"
+        index_rst.write_text(index_rst.read_text(encoding="utf-8") + "\nSome new paragraph\n", encoding="utf-8")
+        assert server.poll()
+        html = new_proj.sphinx_report_build / "components" / "dummy_1" / "index.html"
+        assert "Some new paragraph" in html.read_text(encoding="utf-8")
+
+        script = new_proj.sphinx_report_project_components / "dummy_1" / "asset_scripts" / "plotly_plots.py"
+        script.write_text(script.read_text().replace('label="PLOTLY"', 'label="PLOTLY", version=2'))
+        assert server.poll()
+        assert len(new_proj.asset_finder.search_assets("label == 'PLOTLY'")) == 1
+        assert len(new_proj.asset_finder.search_assets("version == 2")) == 1
+    finally:
+        server.stop()
@@ -1,9 +1,26 @@
 from __future__ import annotations
 
+import os
+import re
+
+import jinja2
 import pytest
 
 from pharaoh.assetlib.util import parse_signature
 from pharaoh.templating.second_level.sphinx_ext.asset_ext import split_filter
+from pharaoh.templating.second_level.sphinx_ext.asset_tmpl import (
+    BUILD_PATH_PLACEHOLDER,
+    fill_asset_fragment,
+    get_asset_template,
+    render_asset_template,
+)
+from pharaoh.templating.second_level.template_env import (
+    LocalContext,
+    PharaohFileSystemLoader,
+    PharaohTemplateEnv,
+    RenderedFileWriter,
+    write_if_changed,
+)
 
 
 def test_parse_signature_plotly_write_html(tmp_path):
@@ -40,3 +57,132 @@ def test_parse_signature_holoviews_util_save(tmp_path):
 def test_pharaoh_asset_ext_split_filter(string: str, expected: list):
     result = split_filter(string)
     assert result == expected
+
+
+def test_template_loader_up_to_date(tmp_path):
+    template_file = tmp_path / "template.rst.jinja2"
+    template_file.write_text("{{ 1 + 1 }}")
+    env = jinja2.Environment(loader=PharaohFileSystemLoader([tmp_path]))
+
+    template = env.get_template("template.rst.jinja2")
+    assert template.render() == "2"
+    assert template.is_up_to_date
+    assert env.get_template("template.rst.jinja2") is template
+
+    template_file.write_text("{{ 2 + 2 }}")
+    stat = template_file.stat()
+    os.utime(template_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not template.is_up_to_date
+    assert env.get_template("template.rst.jinja2").render() == "4"
+
+
+def test_asset_template_cache(tmp_path):
+    jinja_env = PharaohTemplateEnv()
+    template = get_asset_template(jinja_env, "include_wrapper")
+    assert get_asset_template(jinja_env, "include_wrapper") is template
+    assert list(jinja_env.asset_template_files) == ["include_wrapper"]
+
+    template_file = tmp_path / "custom.rst.jinja2"
+    template_file.write_text("{{ content }} 1")
+    assert render_asset_template(jinja_env, str(template_file), content="Version") == "\nVersion 1\n"
+    assert get_asset_template(jinja_env, str(template_file)) is get_asset_template(jinja_env, str(template_file))
+
+    template_file.write_text("{{ content }} 2")
+    stat = template_file.stat()
+    os.utime(template_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert render_asset_template(jinja_env, str(template_file), content="Version") == "\nVersion 2\n"
+
+
+def test_local_context_file_cache(tmp_path):
+    def touch(path):
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    jinja_env = PharaohTemplateEnv()
+    yaml_file = tmp_path / "data_context.yaml"
+    yaml_file.write_text("value: 1\ndouble: ${value}")
+    py_file = tmp_path / "script_context.py"
+    py_file.write_text("context = {'value': 1}")
+
+    local = jinja_env.read_local_context_files({}, tmp_path)
+    assert local["data"].double == 1
+    assert local["script"] == {"value": 1}
+    again = jinja_env.read_local_context_files({}, tmp_path)
+    assert again["data"] is local["data"]
+    assert again["script"] is local["script"]
+
+    yaml_file.write_text("value: 2\ndouble: ${value}")
+    touch(yaml_file)
+    py_file.write_text("context = {'value': 2}")
+    touch(py_file)
+    local = jinja_env.read_local_context_files({}, tmp_path)
+    assert local["data"].double == 2
+    assert local["script"] == {"value": 2}
+
+
+def test_local_context_lazy_loading():
+    loaded = []
+
+    def loader():
+        loaded.append(True)
+        return {"foo": "bar"}
+
+    local = LocalContext()
+    local["eager"] = {"foo": "baz"}
+    local.set_lazy("lazy", loader)
+    assert "lazy" in local
+    assert list(local) == ["eager", "lazy"]
+    assert not loaded
+
+    template = jinja2.Environment().from_string("{{ ctx.local.eager.foo }} {{ ctx.local.lazy.foo }}")
+    assert template.render(ctx={"local": local}) == "baz bar"
+    assert template.render(ctx={"local": local}) == "baz bar"
+    assert len(loaded) == 1
+
+
+def test_local_context_is_dict():
+    local = LocalContext(eager=1)
+    local.set_lazy("lazy", lambda: {"foo": "bar"})
+    assert isinstance(local, dict)
+    assert repr(local) == "LocalContext({'eager': 1}, not loaded: ['lazy'])"
+    assert dict(local) == {"eager": 1, "lazy": {"foo": "bar"}}
+
+    local.set_lazy("other", lambda: [1, 2])
+    template = jinja2.Environment().from_string("{{ ctx.local | tojson }}")
+    assert template.render(ctx={"local": local}) == '{"eager": 1, "lazy": {"foo": "bar"}, "other": [1, 2]}'
+    assert local == {"eager": 1, "lazy": {"foo": "bar"}, "other": [1, 2]}
+
+    local.set_lazy("popped", lambda: "value")
+    copy = local.copy()
+    assert local.pop("popped") == "value"
+    assert "popped" not in local
+    assert copy["popped"] == "value"
+
+
+def test_rendered_file_writer(tmp_path):
+    rendered_file = tmp_path / "index.rst.rendered"
+    assert write_if_changed(rendered_file, "content")
+    assert not write_if_changed(rendered_file, "content")
+    assert write_if_changed(rendered_file, "changed")
+
+    writer = RenderedFileWriter()
+    writer.write(rendered_file, "written in background")
+    writer.flush()
+    assert rendered_file.read_text(encoding="utf-8") == "written in background"
+
+
+def test_fill_asset_fragment():
+    fragment = (
+        f".. _asset_@@pharaoh_rand_id_0_@@:\n\n"
+        f'<iframe src="{BUILD_PATH_PLACEHOLDER}" id="@@pharaoh_rand_id_1_6@@">\n'
+        f":ref:`Title <asset_@@pharaoh_rand_id_0_@@>`"
+    )
+    first = fill_asset_fragment(fragment, lambda: "../pharaoh_assets/plot.html")
+    second = fill_asset_fragment(fragment, lambda: "../pharaoh_assets/plot.html")
+    assert "@@" not in first
+    assert 'src="../pharaoh_assets/plot.html"' in first
+    label = re.search(r"_asset_(\w+):", first).group(1)
+    assert f"<asset_{label}>" in first
+    assert len(re.search(r'id="(\w+)"', first).group(1)) == 6
+    # Each inclusion gets unique IDs
+    assert first != second